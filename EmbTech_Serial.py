@@ -12,6 +12,13 @@ import threading
 import tempfile
 import shlex
 import importlib
+import codecs
+import selectors
+import socket
+import queue
+import mmap
+import struct
+from array import array
 
 DATALOGGER_MODULE_AVAILABLE = None
 DataLoggerConfigDialog = None
@@ -74,6 +81,16 @@ class DataLoggerManager:
         wb.save(path)
         return []
 
+    # Sem o módulo avançado não há thread de gravação: a interface chama estes métodos do mesmo jeito
+    def start_worker(self):
+        pass
+
+    def stop_worker(self, timeout=5.0):
+        pass
+
+    def submit_event(self, event):
+        pass
+
     def get_preview_state(self):
         return {}
 from collections import deque
@@ -88,10 +105,10 @@ from PyQt6.QtWidgets import (
     QFileDialog, QMessageBox, QCheckBox, QDialog, QDialogButtonBox,
     QTabWidget, QFormLayout, QSpinBox, QDoubleSpinBox, QListWidget, QListWidgetItem,
     QToolButton, QMenu, QRadioButton, QSizePolicy, QTableWidget, QTableWidgetItem,
-    QHeaderView, QScrollArea, QSplitter
+    QHeaderView, QScrollArea, QSplitter, QListView, QAbstractItemView, QInputDialog
 )
-from PyQt6.QtCore import QThread, pyqtSignal, QTimer, Qt, QEvent, QPoint, QRegularExpression
-from PyQt6.QtGui import QCursor, QAction, QIcon, QBrush, QColor, QPixmap, QRegularExpressionValidator, QPalette
+from PyQt6.QtCore import QThread, pyqtSignal, QTimer, Qt, QEvent, QPoint, QRegularExpression, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QCursor, QAction, QIcon, QBrush, QColor, QPixmap, QRegularExpressionValidator, QPalette, QKeySequence
 import subprocess
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -401,6 +418,7 @@ class RefreshableComboBox(QComboBox):
     """
     Um QComboBox que atualiza sua lista de itens antes de exibir o popup,
     garantindo que as portas COM estejam sempre atualizadas.
+    A função de atualização usa a enumeração em cache do SerialPortWatcher (não bloqueia).
     """
     def __init__(self, refresh_function, parent=None):
         super().__init__(parent)
@@ -415,6 +433,211 @@ class RefreshableComboBox(QComboBox):
         super().showPopup() # Exibe o popup com a lista atualizada
 
 
+class SerialPortWatcher(QThread):
+    """
+    Detecta a conexão e a remoção de portas seriais em segundo plano e mantém a
+    enumeração em cache, sem varreduras periódicas na thread da interface.
+    No Linux escuta os eventos do kernel (netlink uevent) e só reenumera quando um
+    dispositivo tty aparece ou some; nos demais sistemas, ou sem netlink, reenumera
+    nesta thread a cada POLL_INTERVAL_S.
+    """
+    ports_changed = pyqtSignal(object) # Lista atual de portas (device)
+    port_added = pyqtSignal(str)
+    port_removed = pyqtSignal(str)
+
+    POLL_INTERVAL_S = 2.0
+    SETTLE_S = 0.3                 # Agrupa a rajada de eventos e espera o nó em /dev ser criado
+    NETLINK_KOBJECT_UEVENT = 15
+    UEVENT_SUBSYSTEMS = (b"SUBSYSTEM=tty", b"SUBSYSTEM=usb-serial")
+
+    def __init__(self):
+        super().__init__()
+        self._running = True
+        self._lock = threading.Lock()
+        self._ports = None # None até a primeira enumeração
+        self._rescan_requested = threading.Event()
+
+    @property
+    def ports(self):
+        """Última enumeração (lista de devices), ou None se ainda não houve nenhuma."""
+        with self._lock:
+            return list(self._ports) if self._ports is not None else None
+
+    def request_rescan(self):
+        self._rescan_requested.set()
+
+    def stop(self):
+        self._running = False
+        self._rescan_requested.set()
+        self.wait(2000)
+
+    def _open_uevent_socket(self):
+        if platform.system() != "Linux" or not hasattr(socket, "AF_NETLINK"):
+            return None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, self.NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, 1)) # Grupo 1: eventos emitidos pelo kernel
+            sock.settimeout(0.5)
+        except OSError as e:
+            print(f"Aviso: eventos de hot-plug indisponíveis, usando varredura periódica: {e}")
+            return None
+        return sock
+
+    def _is_serial_uevent(self, sock):
+        try:
+            message = sock.recv(65536)
+        except socket.timeout:
+            return False
+        except OSError:
+            return False
+        return any(subsystem in message for subsystem in self.UEVENT_SUBSYSTEMS)
+
+    def _scan(self):
+        try:
+            ports = sorted(port.device for port in serial.tools.list_ports.comports())
+        except Exception as e:
+            print(f"Erro ao enumerar portas seriais: {e}")
+            return
+        with self._lock:
+            previous = self._ports
+            self._ports = ports
+        if ports == previous:
+            return
+        if previous is None:
+            # Primeira enumeração: não é hot-plug, só preenche o cache
+            self.ports_changed.emit(list(ports))
+            return
+        for device in ports:
+            if device not in previous:
+                self.port_added.emit(device)
+        for device in previous:
+            if device not in ports:
+                self.port_removed.emit(device)
+        self.ports_changed.emit(list(ports))
+
+    def run(self):
+        sock = self._open_uevent_socket()
+        try:
+            self._scan()
+            while self._running:
+                if sock is None:
+                    self._rescan_requested.wait(self.POLL_INTERVAL_S)
+                elif self._is_serial_uevent(sock):
+                    # Descarta os eventos seguintes da mesma rajada antes de reenumerar
+                    settle_until = time.monotonic() + self.SETTLE_S
+                    while self._running and time.monotonic() < settle_until:
+                        self._is_serial_uevent(sock)
+                elif not self._rescan_requested.is_set():
+                    continue
+                self._rescan_requested.clear()
+                if self._running:
+                    self._scan()
+        finally:
+            if sock is not None:
+                sock.close()
+
+
+class PortCounters:
+    """
+    Contadores acumulados de vazão e saúde de uma porta. Cada campo tem um único escritor
+    (a thread de leitura ou a de escrita), então dispensam lock; a interface só lê.
+    """
+    RX_FIELDS = ("rx_bytes", "rx_items", "crc_errors", "wakeups", "max_rx_batch")
+    TX_FIELDS = ("tx_bytes", "tx_frames", "tx_errors", "max_tx_queue")
+
+    def __init__(self):
+        for field in self.RX_FIELDS + self.TX_FIELDS:
+            setattr(self, field, 0)
+
+    def snapshot(self, fields):
+        return {field: getattr(self, field) for field in fields}
+
+
+class ReceiveRingBuffer:
+    """
+    Buffer circular de bytes recebidos, dimensionado em bytes.
+    As posições são absolutas (total de bytes já escritos), então um cursor de leitura
+    continua válido enquanto o buffer dá voltas; se o cursor ficar para trás de mais de
+    'capacity' bytes, o trecho perdido é contado uma única vez em 'overflow_bytes'
+    (leituras repetidas a partir do mesmo cursor não somam a mesma perda de novo).
+    Cada bloco gravado é marcado com (posição inicial, instante monotônico), o que permite
+    localizar "tudo o que chegou depois de t" sob o mesmo lock da escrita.
+    """
+    MAX_CHUNK_MARKS = 4096
+
+    def __init__(self, capacity=1 << 20):
+        self.capacity = int(capacity)
+        self._data = bytearray(self.capacity)
+        self._view = memoryview(self._data)
+        self._lock = threading.Lock()
+        self._marks = deque(maxlen=self.MAX_CHUNK_MARKS)
+        self._evicted_rx_time = None # Instante da marca mais recente descartada do deque
+        self.total_written = 0
+        self.overflow_bytes = 0
+        self._overflow_counted_until = 0 # Perdas antes desta posição já foram contadas
+
+    def append(self, chunk, rx_time=None):
+        size = len(chunk)
+        if not size:
+            return self.total_written
+        with self._lock:
+            if len(self._marks) == self._marks.maxlen:
+                self._evicted_rx_time = self._marks[0][1]
+            self._marks.append((self.total_written, time.monotonic() if rx_time is None else rx_time))
+            if size > self.capacity:
+                # Só cabem os últimos 'capacity' bytes
+                self.total_written += size - self.capacity
+                chunk = memoryview(chunk)[size - self.capacity:]
+                size = self.capacity
+            start = self.total_written % self.capacity
+            first = min(size, self.capacity - start)
+            self._view[start:start + first] = chunk[:first]
+            if first < size:
+                self._view[:size - first] = chunk[first:]
+            self.total_written += size
+            return self.total_written
+
+    def read(self, start, end=None):
+        """Retorna os bytes entre as posições absolutas [start, end) em uma única cópia."""
+        with self._lock:
+            end = self.total_written if end is None else min(end, self.total_written)
+            oldest = max(0, self.total_written - self.capacity)
+            if start < oldest:
+                lost_from = max(start, self._overflow_counted_until)
+                if lost_from < oldest:
+                    self.overflow_bytes += oldest - lost_from
+                    self._overflow_counted_until = oldest
+                start = oldest
+            if start >= end:
+                return b""
+            begin, stop = start % self.capacity, end % self.capacity
+            if begin < stop or stop == 0:
+                return self._view[begin:stop or self.capacity].tobytes()
+            return b"".join((self._view[begin:], self._view[:stop]))
+
+    @property
+    def oldest_position(self):
+        """Posição absoluta do byte mais antigo ainda disponível no anel."""
+        with self._lock:
+            return max(0, self.total_written - self.capacity)
+
+    def position_since(self, since):
+        """
+        Posição absoluta do primeiro bloco recebido em ou depois do instante monotônico 'since'.
+        Retorna None se a marca desse bloco já foi descartada (mais de MAX_CHUNK_MARKS blocos
+        chegaram desde então): o início exato não é mais conhecido.
+        """
+        with self._lock:
+            position = self.total_written
+            for start, rx_time in reversed(self._marks):
+                if rx_time < since:
+                    return position
+                position = start
+            if self._evicted_rx_time is not None and self._evicted_rx_time >= since:
+                return None
+            return position
+
+
 class SerialReaderThread(QThread):
     """
     Thread dedicada para leitura de dados de uma porta serial.
@@ -422,19 +645,224 @@ class SerialReaderThread(QThread):
     Emite 'data_received' quando dados são recebidos e 'connection_lost' em caso de erro.
     """
     # data_received agora emite bytes para a porta Modbus e string para a porta serial principal
-    data_received = pyqtSignal(object, str) # Sinal para dados recebidos (dados, nome da porta)
+    # (ou uma lista de strings quando a leitura em bloco entrega várias linhas de uma vez)
+    # Terceiro argumento: instante de recepção (time.monotonic_ns) de cada item, int ou lista paralela ao lote
+    data_received = pyqtSignal(object, str, object) # Sinal para dados recebidos (dados, nome da porta, recepção)
     connection_lost = pyqtSignal(str)    # Sinal para conexão perdida (nome da porta)
 
+    RTU_MAX_FRAME_BYTES = 256        # Tamanho máximo de um ADU Modbus RTU
+    RESPONSE_BUFFER_BYTES = 1 << 20  # 1 MiB de histórico bruto por porta
+    DELIVERY_INTERVAL_S = 0.03       # Sob fluxo contínuo, entrega à interface no máximo a cada ~30 ms
+    BULK_IDLE_FLUSH_S = 0.5          # Linha sem '\n' é entregue após este tempo sem novos bytes
+    BULK_MAX_PENDING_CHARS = 65536   # Protege contra fluxo sem quebras de linha
+    multiplexer = None               # SerialIOMultiplexer compartilhado (Linux, opcional); None = uma thread por porta
+
     def __init__(self, ser_instance, port_name="", is_modbus_port=False):
         super().__init__()
         self.ser = ser_instance
         self._running = True # Flag para controlar o loop da thread
         # Buffer para armazenar as últimas respostas (bytes para Modbus, string para serial)
-        self._response_buffer = deque(maxlen=100) 
-        self._clear_response_buffer_flag = False # Flag para limpar o buffer antes de um novo passo de teste
+        self._response_ring = ReceiveRingBuffer(self.RESPONSE_BUFFER_BYTES)
+        self._step_cursor = 0      # Início (posição absoluta) da resposta do passo atual
+        self._complete_end = 0     # Fim da última linha/frame completo já entregue
         self.port_name = port_name # Nome da porta para identificação em logs
         self.is_modbus_port = is_modbus_port # Flag para indicar se é uma porta Modbus
         self.read_mode = "modbus" if is_modbus_port else "serial"
+        self.last_frame_time = None
+        self._pending_delivery = []  # Linhas/frames lidos e ainda não entregues à interface
+        self._pending_delivery_rx_ns = []  # Instante de recepção de cada item pendente
+        self._last_rx_ns = time.monotonic_ns()  # Leitura mais recente da porta
+        self.last_complete_rx_ns = None  # Recepção da última linha/frame completo
+        self.counters = PortCounters()
+        self._last_delivery = time.monotonic()
+        self._multiplexer = None     # Multiplexador em que a porta está registrada (em vez da thread própria)
+        self._rtu_frame = bytearray()  # Frame RTU em montagem no modo multiplexado
+        self._rtu_last_rx = 0.0
+        self._reset_line_framer()
+
+    @staticmethod
+    def rtu_silence_seconds(baudrate):
+        """
+        Intervalo t3.5 do Modbus RTU: 3,5 caracteres de 11 bits na taxa da porta.
+        Acima de 19200 bps a especificação fixa 1,75 ms.
+        """
+        try:
+            baud = float(baudrate)
+        except (TypeError, ValueError):
+            baud = 9600.0
+        if baud <= 0:
+            baud = 9600.0
+        if baud > 19200:
+            return 0.00175
+        return 3.5 * 11.0 / baud
+
+    def _read_modbus_frame(self):
+        """
+        Monta um frame RTU: espera o primeiro byte com o timeout da porta (sem busy loop),
+        acumula os bytes seguintes e encerra o frame após t3.5 de silêncio.
+        """
+        first = self.ser.read(self.ser.in_waiting or 1)
+        self.counters.wakeups += 1
+        if not first:
+            return
+        frame = bytearray(first)
+        silence = self.rtu_silence_seconds(getattr(self.ser, "baudrate", 9600))
+        poll_interval = max(0.0005, silence / 4.0)
+        last_rx = self._stamp_rx()
+        while self._running and len(frame) < self.RTU_MAX_FRAME_BYTES:
+            waiting = self.ser.in_waiting
+            if waiting:
+                frame += self.ser.read(waiting)
+                last_rx = self._stamp_rx()
+                continue
+            if time.monotonic() - last_rx >= silence:
+                break
+            time.sleep(poll_interval)
+        self._finish_modbus_frame(bytes(frame), last_rx)
+
+    def _finish_modbus_frame(self, data, last_rx):
+        self.last_frame_time = last_rx
+        self.counters.rx_bytes += len(data)
+        if not modbus_lib.has_valid_crc(data):
+            self.counters.crc_errors += 1
+        self._complete_end = self._response_ring.append(data, last_rx)
+        self._queue_delivery([data])
+
+    def _stamp_rx(self):
+        """Marca o instante da leitura (monotonic_ns) e o retorna em segundos, no mesmo relógio de time.monotonic()."""
+        self._last_rx_ns = time.monotonic_ns()
+        return self._last_rx_ns / 1e9
+
+    def _reset_line_framer(self):
+        self._line_decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._pending_text = ""
+        self._last_rx_time = time.monotonic()
+
+    def _read_serial_bulk(self):
+        """
+        Leitura em bloco da porta principal: lê in_waiting (ou 1 byte, aguardando o
+        timeout da porta), decodifica incrementalmente e emite as linhas completas em
+        uma única lista. O resto sem '\n' fica pendente até chegar o fim da linha ou
+        até BULK_IDLE_FLUSH_S sem novos bytes.
+        """
+        chunk = self.ser.read(self.ser.in_waiting or 1)
+        self.counters.wakeups += 1
+        if not chunk:
+            self._flush_idle_line(time.monotonic())
+            return
+        self._feed_serial_chunk(chunk, self._stamp_rx())
+
+    def _flush_idle_line(self, now):
+        if self._pending_text and now - self._last_rx_time >= self.BULK_IDLE_FLUSH_S:
+            self._emit_lines([self._pending_text.strip()], self._response_ring.total_written)
+            self._pending_text = ""
+
+    def _feed_serial_chunk(self, chunk, now):
+        self._last_rx_time = now
+        self.counters.rx_bytes += len(chunk)
+        written = self._response_ring.append(chunk, now)
+        text = self._pending_text + self._line_decoder.decode(chunk)
+        if "\n" not in text:
+            if len(text) >= self.BULK_MAX_PENDING_CHARS:
+                self._emit_lines([text.strip()], written)
+                text = ""
+            self._pending_text = text
+            return
+        parts = text.split("\n")
+        self._pending_text = parts.pop()
+        # A resposta do passo só avança até o último '\n': linha parcial não é validada
+        line_end = written - (len(chunk) - chunk.rfind(b"\n") - 1) if b"\n" in chunk else written
+        self._emit_lines([part.strip() for part in parts], line_end)
+
+    def _emit_lines(self, lines, complete_end):
+        if not lines:
+            return
+        self._complete_end = max(self._complete_end, complete_end)
+        self._queue_delivery(lines)
+
+    def _queue_delivery(self, items):
+        # Cada item leva o instante da leitura que o completou
+        self._pending_delivery.extend(items)
+        self._pending_delivery_rx_ns.extend([self._last_rx_ns] * len(items))
+        self.last_complete_rx_ns = self._last_rx_ns
+        self.counters.rx_items += len(items)
+        self.counters.max_rx_batch = max(self.counters.max_rx_batch, len(self._pending_delivery))
+
+    def _flush_delivery(self):
+        """Entrega à interface tudo o que foi lido desde a última entrega, em um único sinal."""
+        items, self._pending_delivery = self._pending_delivery, []
+        rx_ns, self._pending_delivery_rx_ns = self._pending_delivery_rx_ns, []
+        self._last_delivery = time.monotonic()
+        if items:
+            if len(items) > 1:
+                self.data_received.emit(items, self.port_name, rx_ns)
+            else:
+                self.data_received.emit(items[0], self.port_name, rx_ns[0])
+
+    def _maybe_flush_delivery(self):
+        # Entrega em lote: imediatamente quando a porta fica ociosa, ou a cada
+        # DELIVERY_INTERVAL_S enquanto o dispositivo continua enviando
+        if self._pending_delivery and (
+            not self.ser.in_waiting or time.monotonic() - self._last_delivery >= self.DELIVERY_INTERVAL_S
+        ):
+            self._flush_delivery()
+
+    def service_readable(self):
+        """
+        Modo multiplexado: o descritor da porta sinalizou leitura. Lê o que houver sem
+        bloquear e alimenta o framer (frame RTU por t3.5 ou linhas em bloco).
+        """
+        chunk = self.ser.read(self.ser.in_waiting or 1)
+        self.counters.wakeups += 1
+        if not chunk:
+            return
+        now = self._stamp_rx()
+        if self.read_mode == "modbus":
+            self._rtu_frame += chunk
+            self._rtu_last_rx = now
+            if len(self._rtu_frame) >= self.RTU_MAX_FRAME_BYTES:
+                self._finish_pending_rtu_frame()
+        else:
+            self._feed_serial_chunk(chunk, now)
+
+    def _finish_pending_rtu_frame(self):
+        data, self._rtu_frame = bytes(self._rtu_frame), bytearray()
+        self._finish_modbus_frame(data, self._rtu_last_rx)
+
+    def service_timers(self, now):
+        """
+        Modo multiplexado: fecha o frame RTU após t3.5 de silêncio, entrega a linha sem '\n'
+        após BULK_IDLE_FLUSH_S e faz a entrega em lote à interface.
+        Retorna os segundos até o próximo prazo desta porta, ou None se não houver.
+        """
+        deadlines = []
+        if self._rtu_frame:
+            silence = self.rtu_silence_seconds(getattr(self.ser, "baudrate", 9600))
+            remaining = self._rtu_last_rx + silence - now
+            if remaining <= 0:
+                self._finish_pending_rtu_frame()
+            else:
+                deadlines.append(remaining)
+        if self._pending_text:
+            self._flush_idle_line(now)
+            if self._pending_text:
+                deadlines.append(self._last_rx_time + self.BULK_IDLE_FLUSH_S - now)
+        self._maybe_flush_delivery()
+        if self._pending_delivery:
+            deadlines.append(self._last_delivery + self.DELIVERY_INTERVAL_S - now)
+        return max(0.0, min(deadlines)) if deadlines else None
+
+    def start(self, *args, **kwargs):
+        """
+        Com o multiplexador ativo, a porta é registrada na thread de I/O compartilhada
+        em vez de criar a sua própria. Sem ele, inicia a thread normalmente.
+        """
+        mux = SerialReaderThread.multiplexer
+        if mux is not None and SerialIOMultiplexer.port_fileno(self.ser) is not None:
+            self._multiplexer = mux
+            mux.add_reader(self)
+            return
+        super().start(*args, **kwargs)
 
     def run(self):
         """
@@ -442,28 +870,14 @@ class SerialReaderThread(QThread):
         """
         while self._running and self.ser.is_open:
             try:
-                if self._clear_response_buffer_flag:
-                    self._response_buffer.clear()
-                    self._clear_response_buffer_flag = False
+                self._maybe_flush_delivery()
 
                 if self.read_mode == "modbus":
-                    # Para Modbus, leia bytes diretamente
-                    # A leitura de Modbus deve ser mais controlada (ex: por um timeout de inter-caracteres)
-                    # Aqui, faremos uma leitura simples com timeout da porta
-                    # Você pode precisar de uma lógica de leitura mais robusta para Modbus (ex: espera por X bytes ou timeout de silêncio)
-                    line_bytes = self.ser.read_all() # Lê todos os bytes disponíveis até o timeout
-                    if line_bytes:
-                        self.data_received.emit(line_bytes, self.port_name)
-                        self._response_buffer.append(line_bytes)
+                    # Para Modbus, um sinal por frame RTU completo (silêncio t3.5 entre frames)
+                    self._read_modbus_frame()
                 else:
-                    # Para porta serial principal, decodifique para string
-                    line_bytes = self.ser.readline() # Lê uma linha da serial
-                    if line_bytes:
-                        # Decodifica e remove espaços em branco (incluindo o '\n' final)
-                        line_str = line_bytes.decode('utf-8', errors='ignore').strip() 
-                        # Emite o sinal mesmo se a linha for vazia (representa uma linha em branco do dispositivo)
-                        self.data_received.emit(line_str, self.port_name) 
-                        self._response_buffer.append(line_str) # Adiciona ao buffer
+                    # Porta serial principal: leitura em bloco e separação incremental das linhas
+                    self._read_serial_bulk()
 
             except serial.SerialException:
                 # Erro de comunicação serial (ex: cabo desconectado)
@@ -480,6 +894,11 @@ class SerialReaderThread(QThread):
         Para a execução da thread de forma segura.
         """
         self._running = False
+        if self._multiplexer is not None:
+            # Modo multiplexado: basta retirar a porta da thread de I/O compartilhada
+            self._multiplexer.remove_reader(self)
+            self._multiplexer = None
+            return
         try:
             cancel_read = getattr(self.ser, "cancel_read", None)
             if callable(cancel_read):
@@ -496,36 +915,808 @@ class SerialReaderThread(QThread):
 
     def get_buffered_response(self):
         """
-        Retorna o conteúdo atual do buffer de respostas e o limpa.
+        Retorna a resposta acumulada desde o início do passo e avança o cursor.
         Retorna bytes para Modbus e string para serial principal.
         """
-        if not self._response_buffer:
-            return b"" if self.read_mode == "modbus" else ""
+        end = self._complete_end
+        response = self._decode_response(self._response_ring.read(self._step_cursor, end))
+        self._step_cursor = max(self._step_cursor, end)
+        return response
 
-        has_bytes = any(isinstance(x, (bytes, bytearray)) for x in self._response_buffer)
-        if has_bytes:
-            response_bytes = b"".join(
-                x if isinstance(x, (bytes, bytearray)) else str(x).encode("utf-8", errors="ignore")
-                for x in self._response_buffer
-            )
-            self._response_buffer.clear()
-            return response_bytes
+    def peek_buffered_response(self):
+        """
+        Igual a get_buffered_response, mas sem avançar o cursor.
+        Usado para validar a resposta parcial enquanto o passo ainda aguarda dados.
+        """
+        return self._decode_response(self._response_ring.read(self._step_cursor, self._complete_end))
 
-        response_str = "\n".join(self._response_buffer)
-        self._response_buffer.clear()
-        return response_str
+    def _decode_response(self, raw):
+        if self.read_mode == "modbus":
+            return raw
+        if not raw:
+            return ""
+        # Mesmo formato de antes: linhas sem espaços nas pontas, unidas por '\n'
+        lines = raw.decode("utf-8", errors="ignore").split("\n")
+        if len(lines) > 1 and not lines[-1]:
+            lines.pop()
+        return "\n".join(line.strip() for line in lines)
+
+    @property
+    def response_overflow_bytes(self):
+        """Bytes descartados porque o passo não os leu antes de o buffer circular dar a volta."""
+        return self._response_ring.overflow_bytes
+
+    def get_counters(self):
+        counters = self.counters.snapshot(PortCounters.RX_FIELDS)
+        counters["overflow_bytes"] = self.response_overflow_bytes
+        return counters
 
     def set_read_mode(self, mode):
         if mode not in ("serial", "modbus"):
             return
+        if mode != self.read_mode:
+            self._reset_line_framer()
+            self._rtu_frame = bytearray()
         self.read_mode = mode
-    
+
+    def begin_step(self, since=None):
+        """
+        Abre a resposta de um novo passo. Sem 'since', a resposta começa no que chegar daqui
+        em diante; com 'since' (time.monotonic() de antes da escrita do comando), começa no
+        primeiro bloco recebido a partir desse instante, mesmo que já tenha chegado.
+        Retorna False se o início exato se perdeu (rajada de blocos descartou a marca): a
+        resposta passa a começar no byte mais antigo ainda no buffer.
+        """
+        if since is None:
+            self._step_cursor = self._response_ring.total_written
+            return True
+        position = self._response_ring.position_since(since)
+        if position is None:
+            self._step_cursor = self._response_ring.oldest_position
+            return False
+        self._step_cursor = position
+        return True
+
     def clear_response_buffer_for_next_step(self):
         """
-        Define uma flag para limpar o buffer na próxima iteração do loop de leitura.
-        Usado para garantir que a resposta de um novo passo não contenha dados antigos.
+        Move o cursor do passo para o fim do que já foi recebido (sem apagar o histórico).
+        Garante que a resposta de um novo passo não contenha dados antigos.
+        """
+        self.begin_step()
+
+
+class SerialIOMultiplexer(QThread):
+    """
+    Thread única de I/O para todas as portas abertas (opcional, só no Linux).
+    Registra o descritor de cada porta em um selector (epoll) e despacha a leitura para
+    o SerialReaderThread correspondente, que nesse modo não cria thread própria.
+    Os prazos de cada porta (t3.5, linha ociosa, entrega em lote) definem o timeout do select.
+    """
+    IDLE_SELECT_S = 0.5  # Espera máxima do select quando nenhuma porta tem prazo pendente
+
+    def __init__(self):
+        super().__init__()
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._lock = threading.Lock()
+        self._requests = deque()  # ("add" | "remove", leitor, evento de conclusão)
+        self._readers = {}        # descritor -> SerialReaderThread
+        self._running = True
+
+    @staticmethod
+    def is_supported():
+        return platform.system() == "Linux" and hasattr(selectors, "EpollSelector")
+
+    @staticmethod
+    def port_fileno(ser):
+        """Descritor da porta aberta, ou None quando a porta não expõe um (ex.: Windows)."""
+        try:
+            return ser.fileno() if ser.is_open else None
+        except (AttributeError, ValueError, OSError, serial.SerialException):
+            return None
+
+    def add_reader(self, reader):
+        self._submit("add", reader)
+
+    def remove_reader(self, reader, timeout=2.0):
+        """Retira a porta do selector; espera a thread de I/O confirmar antes de retornar."""
+        done = self._submit("remove", reader)
+        if self.isRunning():
+            done.wait(timeout)
+
+    def stop(self):
+        self._running = False
+        self._wake()
+        self.wait(2000)
+
+    def _submit(self, action, reader):
+        done = threading.Event()
+        with self._lock:
+            self._requests.append((action, reader, done))
+        self._wake()
+        return done
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass # Pipe cheio: a thread já tem um despertar pendente
+
+    def _drain_wake_pipe(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except OSError:
+            pass
+
+    def _apply_requests(self):
+        with self._lock:
+            requests, self._requests = self._requests, deque()
+        for action, reader, done in requests:
+            if action == "add":
+                self._register(reader)
+            else:
+                self._unregister(reader)
+            done.set()
+
+    def _register(self, reader):
+        fd = self.port_fileno(reader.ser)
+        if fd is None:
+            reader._running = False
+            reader.connection_lost.emit(reader.port_name)
+            return
+        if fd in self._readers:
+            return
+        self._selector.register(fd, selectors.EVENT_READ, reader)
+        self._readers[fd] = reader
+
+    def _unregister(self, reader):
+        for fd, registered in list(self._readers.items()):
+            if registered is reader:
+                del self._readers[fd]
+                try:
+                    self._selector.unregister(fd)
+                except (KeyError, ValueError, OSError):
+                    pass
+
+    def _drop(self, reader, lost=True):
+        self._unregister(reader)
+        reader._running = False
+        if lost:
+            reader.connection_lost.emit(reader.port_name)
+
+    def _dispatch(self, reader, callback, *args):
+        try:
+            return callback(*args)
+        except serial.SerialException:
+            # Erro de comunicação serial (ex: cabo desconectado)
+            self._drop(reader)
+        except Exception as e:
+            print(f"Erro inesperado na thread de I/O serial ({reader.port_name}): {e}")
+            self._drop(reader)
+        return None
+
+    def _service_timers(self):
+        timeout = self.IDLE_SELECT_S
+        now = time.monotonic()
+        for reader in list(self._readers.values()):
+            if not reader.ser.is_open:
+                self._drop(reader, lost=False) # Porta fechada pela interface: encerra em silêncio
+                continue
+            remaining = self._dispatch(reader, reader.service_timers, now)
+            if remaining is not None:
+                timeout = min(timeout, remaining)
+        return timeout
+
+    def run(self):
+        while self._running:
+            self._apply_requests()
+            timeout = self._service_timers()
+            try:
+                events = self._selector.select(timeout)
+            except OSError as e:
+                print(f"Erro inesperado no selector de I/O serial: {e}")
+                continue
+            for key, _mask in events:
+                reader = key.data
+                if reader is None:
+                    self._drain_wake_pipe()
+                elif key.fd in self._readers:
+                    self._dispatch(reader, reader.service_readable)
+        self._apply_requests()
+        for reader in list(self._readers.values()):
+            self._drop(reader, lost=False)
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+
+class SerialWriterThread(QThread):
+    """
+    Fila de escrita de uma porta, fora da thread da interface. Um quadro por vez (nunca se
+    intercalam), por prioridade: motor de teste, depois comandos manuais, depois auto-envio.
+    Aplica o intervalo mínimo entre quadros e o tempo de retorno RS-485 após cada escrita
+    e mede a latência de cada quadro (espera na fila + escrita).
+    """
+    PRIORITY_TEST = 0
+    PRIORITY_MANUAL = 1
+    PRIORITY_AUTO_SEND = 2
+    QUEUE_POLL_S = 0.5 # Intervalo para perceber que a porta foi fechada
+
+    # Ticket da escrita e resultado: {"error", "write_started", "queue_s", "write_s"}
+    write_finished = pyqtSignal(int, object)
+
+    def __init__(self, ser_instance, port_name="", inter_frame_gap_ms=0, turnaround_ms=0):
+        super().__init__()
+        self.ser = ser_instance
+        self.port_name = port_name
+        self._queue = queue.PriorityQueue()
+        self._futures = {} # ticket -> QtFuture (acessado só na thread da interface)
+        self._ticket = 0
+        self._running = True
+        self._last_write_end = 0.0
+        self.last_latency_s = None
+        self.max_latency_s = 0.0
+        # Início (time.monotonic_ns) das escritas recentes, para a latência comando -> resposta
+        self.write_stamps_ns = deque(maxlen=64)
+        self.counters = PortCounters()
+        self.set_pacing(inter_frame_gap_ms, turnaround_ms)
+        # O QThread pertence à thread da interface: o slot resolve os futuros nela
+        self.write_finished.connect(self._resolve_write)
+
+    def set_pacing(self, inter_frame_gap_ms=0, turnaround_ms=0):
+        self.inter_frame_gap_s = max(0.0, float(inter_frame_gap_ms or 0) / 1000.0)
+        self.turnaround_s = max(0.0, float(turnaround_ms or 0) / 1000.0)
+
+    def submit(self, data, priority=PRIORITY_MANUAL, reset_input=False):
+        """
+        Enfileira um quadro; o QtFuture retornado recebe o resultado quando a escrita termina.
+        reset_input limpa o buffer de entrada da porta logo antes de escrever este quadro.
+        """
+        self._ticket += 1
+        future = QtFuture()
+        if not self._running or self.isFinished():
+            future.set_result(self._result(serial.SerialException(f"Porta '{self.port_name}' fechada."), 0.0))
+            return future
+        self._futures[self._ticket] = future
+        self._queue.put((priority, self._ticket, bytes(data), time.monotonic(), reset_input))
+        self.counters.max_tx_queue = max(self.counters.max_tx_queue, self._queue.qsize())
+        return future
+
+    def stop(self):
+        self._running = False
+        self._queue.put((-1, 0, b"", 0.0, False)) # Acorda a thread
+        self.wait(2000)
+
+    def get_counters(self):
+        counters = self.counters.snapshot(PortCounters.TX_FIELDS)
+        counters["tx_queue"] = self._queue.qsize()
+        counters["last_write_latency_ms"] = self.last_latency_s * 1000.0 if self.last_latency_s is not None else None
+        counters["max_write_latency_ms"] = self.max_latency_s * 1000.0
+        return counters
+
+    def last_write_before(self, rx_ns):
+        """Início da escrita mais recente anterior ao instante de recepção rx_ns, ou None."""
+        for stamp in reversed(list(self.write_stamps_ns)):
+            if stamp <= rx_ns:
+                return stamp
+        return None
+
+    @staticmethod
+    def _result(error, queued_at, write_started=None, write_end=None):
+        return {
+            "error": error,
+            "write_started": write_started,
+            "write_started_ns": int(write_started * 1e9) if write_started is not None else None,
+            "queue_s": (write_started - queued_at) if write_started is not None else None,
+            "write_s": (write_end - write_started) if write_end is not None else None,
+        }
+
+    def _resolve_write(self, ticket, result):
+        future = self._futures.pop(ticket, None)
+        if future is not None:
+            future.set_result(result)
+
+    def _write_frame(self, data, queued_at, reset_input=False):
+        gap = self._last_write_end + self.inter_frame_gap_s - time.monotonic()
+        if gap > 0:
+            time.sleep(gap)
+        if reset_input:
+            try:
+                self.ser.reset_input_buffer()
+            except Exception:
+                pass # Falhas da porta aparecem na escrita logo abaixo
+        write_started_ns = time.monotonic_ns()
+        write_started = write_started_ns / 1e9
+        self.write_stamps_ns.append(write_started_ns) # Antes da escrita: a resposta pode chegar antes do retorno
+        try:
+            self.ser.write(data)
+            if self.turnaround_s > 0:
+                # RS-485: espera o último bit sair antes de contar o tempo de retorno do barramento
+                self.ser.flush()
+        except Exception as e:
+            self._last_write_end = time.monotonic()
+            self.counters.tx_errors += 1
+            return self._result(e, queued_at, write_started)
+        write_end = time.monotonic()
+        latency = write_end - queued_at
+        self.counters.tx_bytes += len(data)
+        self.counters.tx_frames += 1
+        self.last_latency_s = latency
+        self.max_latency_s = max(self.max_latency_s, latency)
+        if self.turnaround_s > 0:
+            time.sleep(self.turnaround_s)
+        self._last_write_end = time.monotonic()
+        return self._result(None, queued_at, write_started, write_end)
+
+    def run(self):
+        while self._running and self.ser.is_open:
+            try:
+                _priority, ticket, data, queued_at, reset_input = self._queue.get(timeout=self.QUEUE_POLL_S)
+            except queue.Empty:
+                continue
+            if not ticket:
+                continue
+            self.write_finished.emit(ticket, self._write_frame(data, queued_at, reset_input))
+        self._running = False
+        # Quadros que não chegaram a ser escritos falham em vez de ficarem pendentes
+        while True:
+            try:
+                _priority, ticket, _data, queued_at, _reset_input = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if ticket:
+                self.write_finished.emit(ticket, self._result(serial.SerialException(f"Porta '{self.port_name}' fechada."), queued_at))
+
+
+class QtFuture:
+    """
+    Resultado futuro resolvido pelo loop de eventos do Qt (dado recebido, QTimer, sinal).
+    Pode ser aguardado com 'await' dentro de uma corrotina executada por QtTask.
+    """
+
+    def __init__(self):
+        self._done = False
+        self._result = None
+        self._callbacks = []
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        return self._result
+
+    def set_result(self, value):
+        if self._done:
+            return
+        self._done = True
+        self._result = value
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        if self._done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def __await__(self):
+        if not self._done:
+            yield self
+        return self._result
+
+
+class QtTask:
+    """
+    Executa uma corrotina (async def) no loop de eventos do Qt, no estilo do qasync mas
+    sem dependência extra: cada 'await' de um QtFuture devolve o controle à interface e a
+    corrotina continua, na thread da interface, assim que o futuro é resolvido.
+    """
+
+    def __init__(self, coro, on_error=None):
+        self._coro = coro
+        self._on_error = on_error
+        self._waiting = None
+        self._executing = False
+        self.done = False
+        self._step(None)
+
+    def _step(self, value):
+        if self.done:
+            return
+        self._executing = True
+        try:
+            future = self._coro.send(value)
+        except StopIteration:
+            self.done = True
+            return
+        except Exception as e:
+            self.done = True
+            if self._on_error is None:
+                raise
+            self._on_error(e)
+            return
+        finally:
+            self._executing = False
+        self._waiting = future
+        future.add_done_callback(self._resume)
+
+    def _resume(self, future):
+        if future is not self._waiting:
+            return
+        self._waiting = None
+        self._step(future.result())
+
+    def cancel(self):
+        """Abandona a corrotina no 'await' atual (ex.: teste interrompido)."""
+        if self.done:
+            return
+        self.done = True
+        self._waiting = None
+        if not self._executing:
+            self._coro.close()
+
+
+class SerialPortTransport:
+    """
+    Transporte assíncrono de uma porta para o motor de testes:
+    'await write()', 'await read_until(pred, timeout_ms)' e 'await read_frame(request, timeout_ms)'.
+    A escrita passa pela fila da porta (SerialWriterThread) com a prioridade do motor de teste;
+    a leitura usa o buffer por passo do SerialReaderThread e a espera antecipada da janela
+    principal, que conclui assim que a resposta parcial satisfaz o predicado.
+    """
+
+    def __init__(self, app, ser, reader, port_name, writer=None):
+        self.app = app
+        self.ser = ser
+        self.reader = reader
+        self.port_name = port_name
+        self.writer = writer
+        self.last_write_ns = None
+
+    async def write(self, data):
+        """Escreve e abre a resposta do passo a partir do instante anterior à escrita."""
+        if self.writer is None:
+            write_started = time.monotonic()
+            self.ser.write(data)
+        else:
+            result = await self.writer.submit(data, SerialWriterThread.PRIORITY_TEST)
+            if result["error"] is not None:
+                raise result["error"]
+            write_started = result["write_started"]
+        self.last_write_ns = int(write_started * 1e9)
+        if self.reader is not None and not self.reader.begin_step(since=write_started):
+            self.app.log_message(f"AVISO: Início da resposta em '{self.reader.port_name}' perdido por excesso de dados recebidos; a validação pode incluir dados anteriores ao comando.", "alerta")
+        return write_started
+
+    def response_latency_ms(self):
+        """Latência comando -> resposta: da última escrita até a recepção da última linha/frame completo."""
+        rx_ns = getattr(self.reader, "last_complete_rx_ns", None)
+        if self.last_write_ns is None or rx_ns is None or rx_ns < self.last_write_ns:
+            return None
+        return (rx_ns - self.last_write_ns) / 1e6
+
+    async def read_until(self, is_complete, timeout_ms):
+        """
+        Resposta do passo assim que is_complete(resposta parcial) for verdadeiro, ou no timeout.
+        Retorna None quando a porta não tem thread de leitura.
+        """
+        future = QtFuture()
+        self.app._arm_step_response_wait(self.reader, timeout_ms, is_complete, lambda: future.set_result(None))
+        await future
+        return self.reader.get_buffered_response() if self.reader is not None else None
+
+    async def read_frame(self, request_bytes, timeout_ms):
+        """
+        Resposta Modbus RTU para request_bytes: conclui ao completar o tamanho esperado
+        (ou uma exceção) com CRC válido. Retorna (status, bytes), sem bytes além do frame.
         """
-        self._clear_response_buffer_flag = True
+        def frame_complete(response):
+            if not isinstance(response, (bytes, bytearray)):
+                return False
+            frame_status, _ = modbus_lib.extract_modbus_response(response, request_bytes)
+            return frame_status in (modbus_lib.MODBUS_RESPONSE_COMPLETE, modbus_lib.MODBUS_RESPONSE_EXCEPTION)
+
+        response = await self.read_until(frame_complete, timeout_ms) or b""
+        frame_status, frame = modbus_lib.extract_modbus_response(response, request_bytes)
+        if frame_status in (modbus_lib.MODBUS_RESPONSE_COMPLETE, modbus_lib.MODBUS_RESPONSE_EXCEPTION):
+            return frame_status, frame
+        return frame_status, response
+
+
+class TerminalScrollbackFile:
+    """
+    Histórico completo do terminal em disco, por sessão, somente de acréscimo.
+    Arquivo .log: cada registro é 1 byte do tipo da mensagem + texto UTF-8 + '\n'.
+    Arquivo .idx: deslocamento inicial (uint64) de cada registro.
+    A leitura usa mmap nos dois arquivos: qualquer linha é acessada em O(1) sem
+    manter o histórico na memória, e a busca percorre o mapeamento direto.
+    """
+    RECORD_TYPES = ("informacao", "enviado", "recebido", "sistema", "erro", "test_pass", "test_fail", "alerta")
+    _INDEX_ENTRY = struct.Struct("<Q")
+
+    def __init__(self, directory=None):
+        directory = directory or os.path.join(tempfile.gettempdir(), "EmbTech_Serial")
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"terminal_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+        self.data_path = base + ".log"
+        self.index_path = base + ".idx"
+        self._data = open(self.data_path, "w+b")
+        self._index = open(self.index_path, "w+b")
+        self._type_codes = {name: code for code, name in enumerate(self.RECORD_TYPES)}
+        self._data_size = 0
+        self._data_map = None
+        self._index_map = None
+        self.count = 0
+
+    @property
+    def closed(self):
+        return self._data is None
+
+    def append(self, records):
+        if self._data is None or not records:
+            return
+        offsets = array("Q")
+        chunks = []
+        position = self._data_size
+        for text, msg_type in records:
+            raw = bytes((self._type_codes.get(msg_type, 0),)) + text.encode("utf-8", errors="replace") + b"\n"
+            offsets.append(position)
+            chunks.append(raw)
+            position += len(raw)
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        self._data.write(b"".join(chunks))
+        self._index.write(offsets.tobytes())
+        self._data.flush()
+        self._index.flush()
+        self._data_size = position
+        self.count += len(records)
+
+    def _mapped(self, row):
+        """Garante que o registro 'row' está dentro dos mapeamentos (remapeia se o arquivo cresceu)."""
+        if self._index_map is None or len(self._index_map) < (row + 1) * self._INDEX_ENTRY.size:
+            self._unmap()
+            self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data_map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _unmap(self):
+        for mapping in (self._index_map, self._data_map):
+            if mapping is not None:
+                mapping.close()
+        self._index_map = None
+        self._data_map = None
+
+    def _offset(self, row):
+        if row >= self.count:
+            return self._data_size
+        return self._INDEX_ENTRY.unpack_from(self._index_map, row * self._INDEX_ENTRY.size)[0]
+
+    def record(self, row):
+        """Retorna (texto, tipo) do registro 'row' (0 = primeira linha da sessão)."""
+        if self._data is None or not 0 <= row < self.count:
+            return "", "informacao"
+        self._mapped(row)
+        start, end = self._offset(row), min(self._offset(row + 1), len(self._data_map))
+        raw = self._data_map[start:end - 1]
+        if not raw:
+            return "", "informacao"
+        code = raw[0]
+        msg_type = self.RECORD_TYPES[code] if code < len(self.RECORD_TYPES) else "informacao"
+        return raw[1:].decode("utf-8", errors="replace"), msg_type
+
+    def find(self, text, start_row=0, end_row=None):
+        """Primeira linha em [start_row, end_row) que contém 'text' (sem diferenciar maiúsculas), ou -1."""
+        if self._data is None or not text or start_row >= self.count:
+            return -1
+        end_row = self.count if end_row is None else min(end_row, self.count)
+        self._mapped(self.count - 1)
+        # Decodifica cada linha e compara com casefold(), como a busca no anel em memória:
+        # um padrão em bytes com IGNORECASE só ignoraria maiúsculas em ASCII ("ÇÃO" x "ção")
+        needle = text.casefold()
+        start = self._offset(start_row)
+        for row in range(start_row, end_row):
+            end = min(self._offset(row + 1), len(self._data_map))
+            if needle in self._data_map[start + 1:end - 1].decode("utf-8", errors="replace").casefold():
+                return row
+            start = end
+        return -1
+
+    def close(self, delete=True):
+        if self._data is None:
+            return
+        self._unmap()
+        for handle in (self._data, self._index):
+            handle.close()
+        self._data = None
+        self._index = None
+        if delete:
+            for path in (self.data_path, self.index_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class TerminalLogModel(QAbstractListModel):
+    """
+    Histórico do terminal: anel limitado de registros em texto puro (texto, tipo da mensagem).
+    A cor vem do tipo na hora de desenhar, então trocar o tema recolore todo o histórico.
+    Compartilhado pelo terminal principal e pelo terminal do Criador de Teste.
+    Com um TerminalScrollbackFile, o anel vira só o cache das linhas mais recentes:
+    todas as linhas da sessão continuam roláveis e pesquisáveis a partir do disco.
+    """
+
+    def __init__(self, max_records=20000, colors=None, parent=None, scrollback=None):
+        super().__init__(parent)
+        self._records = deque()
+        self.max_records = max(100, int(max_records))
+        self._colors = dict(colors or {})
+        self._brushes = {}
+        self.scrollback = scrollback
+        self._first_row = 0   # Linha absoluta do arquivo exibida na linha 0 (muda ao limpar)
+        self._tail_start = 0  # Linha absoluta de self._records[0]
+
+    def set_colors(self, colors):
+        self._colors = dict(colors or {})
+        self._brushes = {}
+        # Com o histórico em disco, rowCount() inclui as linhas do arquivo: todas são recoloridas
+        total = self.rowCount()
+        if total:
+            self.dataChanged.emit(self.index(0), self.index(total - 1), [Qt.ItemDataRole.ForegroundRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self.scrollback is not None:
+            return self.scrollback.count - self._first_row
+        return len(self._records)
+
+    def _record(self, row):
+        if self.scrollback is None:
+            return self._records[row]
+        absolute = self._first_row + row
+        if absolute >= self._tail_start:
+            return self._records[absolute - self._tail_start]
+        return self.scrollback.record(absolute)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.rowCount():
+            return None
+        text, msg_type = self._record(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return text
+        if role == Qt.ItemDataRole.ForegroundRole:
+            brush = self._brushes.get(msg_type)
+            if brush is None:
+                color = self._colors.get(msg_type, self._colors.get("informacao"))
+                brush = QBrush(QColor(color)) if color else None
+                self._brushes[msg_type] = brush
+            return brush
+        return None
+
+    def append_records(self, records):
+        """Acrescenta registros (texto, tipo); os mais antigos saem quando o limite é atingido."""
+        if self.scrollback is not None:
+            if not self.scrollback.closed: # Após o fechamento da janela, novas linhas são descartadas
+                self._append_with_scrollback(list(records))
+            return
+        records = list(records)[-self.max_records:]
+        if not records:
+            return
+        overflow = len(self._records) + len(records) - self.max_records
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._records.popleft()
+            self.endRemoveRows()
+        first = len(self._records)
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        self._records.extend(records)
+        self.endInsertRows()
+
+    def _append_with_scrollback(self, records):
+        if not records:
+            return
+        first = self.rowCount()
+        self.scrollback.append(records)
+        self._records.extend(records)
+        overflow = len(self._records) - self.max_records
+        for _ in range(max(0, overflow)):
+            self._records.popleft()
+        self._tail_start = self.scrollback.count - len(self._records)
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        self.endInsertRows()
+
+    def clear_records(self):
+        self.beginResetModel()
+        self._records.clear()
+        if self.scrollback is not None:
+            # O arquivo da sessão é mantido; a visão passa a começar depois dele
+            self._first_row = self._tail_start = self.scrollback.count
+        self.endResetModel()
+
+    def find(self, text, start_row=0):
+        """Próxima linha (a partir de start_row, voltando ao início) que contém 'text', ou -1."""
+        if not text:
+            return -1
+        total = self.rowCount()
+        if self.scrollback is not None:
+            base = self._first_row
+            row = self.scrollback.find(text, base + start_row)
+            if row < 0 and start_row > 0:
+                row = self.scrollback.find(text, base, base + start_row)
+            return row - base if row >= 0 else -1
+        needle = text.casefold()
+        for offset in range(total):
+            row = (start_row + offset) % total
+            if needle in self._records[row][0].casefold():
+                return row
+        return -1
+
+    def text_for_rows(self, rows):
+        total = self.rowCount()
+        return "\n".join(self._record(row)[0] for row in sorted(rows) if 0 <= row < total)
+
+
+class TerminalLogView(QListView):
+    """
+    Visão do terminal: só as linhas visíveis são desenhadas (altura uniforme), então o
+    custo de inserir e rolar não cresce com o histórico. Acompanha o fim enquanto o
+    usuário não rolar para cima.
+    """
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setUniformItemSizes(True)
+        self.setWordWrap(False)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self._follow_tail = True
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        model.rowsInserted.connect(self._on_rows_inserted)
+
+    def _on_scrolled(self, value):
+        self._follow_tail = value >= self.verticalScrollBar().maximum()
+
+    def _on_rows_inserted(self, *_args):
+        if self._follow_tail:
+            self.scrollToBottom()
+
+    def selected_text(self):
+        return self.model().text_for_rows(index.row() for index in self.selectionModel().selectedIndexes())
+
+    def copy_selection(self):
+        text = self.selected_text()
+        if text:
+            QApplication.clipboard().setText(text)
+
+    def find_next(self, text):
+        """Seleciona e mostra a próxima linha que contém 'text'; retorna False se não houver."""
+        current = self.currentIndex().row()
+        row = self.model().find(text, current + 1 if current >= 0 else 0)
+        if row < 0:
+            return False
+        index = self.model().index(row)
+        self._follow_tail = False
+        self.setCurrentIndex(index)
+        self.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+        return True
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Copy):
+            self.copy_selection()
+            return
+        if event.matches(QKeySequence.StandardKey.Find):
+            self.window()._search_terminal_log(self)
+            return
+        super().keyPressEvent(event)
 
 
 class TimerConfigDialog(QDialog):
@@ -777,6 +1968,109 @@ class TestPortConfigDialog(QDialog):
         return serial_settings, modbus_settings
 
 
+class PortCountersDialog(QDialog):
+    """
+    Painel de diagnóstico das portas abertas: vazão nos dois sentidos, erros de CRC,
+    bytes descartados, despertares da leitura e profundidade das filas.
+    Atualiza a cada segundo (taxas = diferença desde a última atualização) e exporta para JSON.
+    """
+    REFRESH_INTERVAL_MS = 1000
+    COLUMNS = (
+        ("port", "Porta"),
+        ("rx_bytes_s", "RX B/s"),
+        ("rx_items_s", "RX linhas/frames/s"),
+        ("tx_bytes_s", "TX B/s"),
+        ("tx_frames_s", "TX quadros/s"),
+        ("crc_errors", "Erros CRC"),
+        ("overflow_bytes", "Descartados (B)"),
+        ("wakeups_s", "Despertares/s"),
+        ("max_rx_batch", "Máx. lote RX"),
+        ("max_tx_queue", "Máx. fila TX"),
+        ("max_write_latency_ms", "Máx. escrita (ms)"),
+    )
+    RATE_FIELDS = ("rx_bytes", "rx_items", "tx_bytes", "tx_frames", "wakeups")
+
+    def __init__(self, collect_counters, parent=None):
+        super().__init__(parent)
+        app_icon = load_app_icon()
+        if not app_icon.isNull():
+            self.setWindowIcon(app_icon)
+        self.setWindowTitle("Diagnóstico das Portas")
+        self.resize(980, 260)
+        self.setWindowFlag(Qt.WindowType.WindowContextHelpButtonHint, False)
+
+        self._collect_counters = collect_counters # Função que retorna a lista de contadores por porta
+        self._previous = {}  # porta -> (instante, contadores)
+        self._rows = []
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([label for _key, label in self.COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.table)
+
+        button_row = QHBoxLayout()
+        button_row.addStretch(1)
+        export_button = QPushButton("Exportar JSON")
+        export_button.clicked.connect(self._export_json)
+        button_row.addWidget(export_button)
+        close_button = QPushButton("Fechar")
+        close_button.clicked.connect(self.close)
+        button_row.addWidget(close_button)
+        layout.addLayout(button_row)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(self.REFRESH_INTERVAL_MS)
+        self.refresh()
+
+    def refresh(self):
+        now = time.monotonic()
+        rows = []
+        for counters in self._collect_counters():
+            row = dict(counters)
+            previous = self._previous.get(row["port"])
+            for field in self.RATE_FIELDS:
+                if previous is None or now <= previous[0]:
+                    row[f"{field}_s"] = 0.0
+                else:
+                    row[f"{field}_s"] = max(0, row.get(field, 0) - previous[1].get(field, 0)) / (now - previous[0])
+            self._previous[row["port"]] = (now, counters)
+            rows.append(row)
+        self._rows = rows
+
+        self.table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, (key, _label) in enumerate(self.COLUMNS):
+                value = row.get(key)
+                if value is None:
+                    text = "-"
+                elif isinstance(value, float):
+                    text = f"{value:.1f}"
+                else:
+                    text = str(value)
+                self.table.setItem(row_index, column, QTableWidgetItem(text))
+
+    def _export_json(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar Diagnóstico das Portas",
+            f"diagnostico_portas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"timestamp": datetime.now().isoformat(timespec="seconds"), "ports": self._rows}, f, indent=4, ensure_ascii=False)
+        except OSError as e:
+            QMessageBox.critical(self, "Erro", f"Não foi possível salvar o arquivo:\n{e}")
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
+
+
 class TestPortsManagerDialog(QDialog):
     SLOT_COUNT = 10
 
@@ -1056,6 +2350,7 @@ class PlacaTesterApp(QMainWindow):
     """
     VERSION = "3.9.8" # Versão atual do aplicativo (incrementada para tema)
     AUTO_STEP_MAX_RETRIES = 2
+    TERMINAL_SCROLLBACK_LINES = 20000 # Linhas mantidas no terminal; as mais antigas saem uma a uma
 
     CONFIG_FILE_TEST_OPERATOR = 'test_operator_config.ini' # Use um nome de arquivo diferente para esta configuração
     CONFIG_SECTION_TEST_OPERATOR = 'TestOperator'
@@ -1088,11 +2383,12 @@ class PlacaTesterApp(QMainWindow):
         self.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
         # Define a posição e o tamanho inicial da janela
         
-        # --- NOVO: Inicialização do timer para monitorar portas COM ---
-        self.port_monitor_timer = QTimer(self)
-        self.port_monitor_timer.setInterval(2000)  # Verifica a cada 2 segundos (ajuste conforme necessário)
-        self.port_monitor_timer.timeout.connect(self._update_available_ports)
-        self.port_monitor_timer.start() # Inicia o timer
+        # Monitor de portas COM em segundo plano (eventos de hot-plug no Linux, varredura fora da interface nos demais)
+        self.port_watcher = SerialPortWatcher()
+        self.port_watcher.ports_changed.connect(self._update_available_ports)
+        self.port_watcher.port_added.connect(lambda device: self.log_message(f"Porta {device} conectada ao sistema.", "informacao"))
+        self.port_watcher.port_removed.connect(lambda device: self.log_message(f"Porta {device} removida do sistema.", "informacao"))
+        self.port_watcher.start()
 
         # Armazenar as portas atualmente listadas para evitar atualizações desnecessárias da UI
         self.current_serial_ports = []
@@ -1108,6 +2404,10 @@ class PlacaTesterApp(QMainWindow):
         self.current_test_index = -1 # Índice do passo atual em execução
         self.test_in_progress = False # Flag para indicar se um teste está em andamento
         self.test_timer = QTimer(self) # Timer para controlar timeouts de resposta em testes
+        # Espera de resposta do passo atual: conclui no timeout ou assim que a resposta parcial já for válida
+        self._step_response_wait = None
+        self._step_wait_token = 0
+        self._step_task = None # Corrotina (QtTask) do passo em execução
         self.passed_steps_count = 0 # Contador de passos aprovados
         self.failed_steps_count = 0 # Contador de passos reprovados
 
@@ -1153,7 +2453,26 @@ class PlacaTesterApp(QMainWindow):
         self.test_creator_tab_index = -1 # Índice da aba do criador de teste
         self.editing_step_index = -1 # Índice do passo sendo editado no criador de teste
         
-        self.log_interaction_count = 0 # Contador para limpar o log automaticamente
+        # Histórico do terminal (anel limitado, compartilhado pelos dois terminais) com
+        # a sessão inteira em um arquivo mapeado em memória para rolagem e busca
+        try:
+            self.terminal_scrollback = TerminalScrollbackFile()
+        except OSError as e:
+            print(f"Aviso: histórico do terminal em disco indisponível: {e}")
+            self.terminal_scrollback = None
+        self.terminal_log_model = TerminalLogModel(self.TERMINAL_SCROLLBACK_LINES, parent=self, scrollback=self.terminal_scrollback)
+        self._terminal_search_text = ""
+        # Thread única de I/O (selectors/epoll) para as portas seriais, opcional e só no Linux
+        self.serial_io_multiplexer = None
+        self.serial_io_multiplexer_enabled = False
+        # Filas de escrita por porta (id da instância serial -> SerialWriterThread)
+        self._port_writers = {}
+        self.write_inter_frame_gap_ms = 0
+        self.write_turnaround_ms = 0
+        # Latência por porta: última recepção e último comando já respondido (monotonic_ns)
+        self._port_last_rx_ns = {}
+        self._port_answered_write_ns = {}
+        self.port_counters_dialog = None # Painel de diagnóstico das portas (não modal)
         self.datalogger_enabled = False
         self.datalogger_path = ""
         self._datalogger_last_ts = None
@@ -1365,12 +2684,19 @@ class PlacaTesterApp(QMainWindow):
         # Uma chamada inicial para popular as listas ao iniciar o app
         self._update_available_ports()
 
-    def _update_available_ports(self):
+    def _update_available_ports(self, available_ports=None):
         """
         Verifica as portas seriais disponíveis e atualiza os QComboBoxes.
+        Sem lista, usa a enumeração em cache do monitor de portas e pede uma nova em
+        segundo plano; só enumera aqui enquanto o monitor ainda não tem nenhuma.
         """
-
-        available_ports = [port.device for port in serial.tools.list_ports.comports()]
+        if available_ports is None:
+            watcher = getattr(self, "port_watcher", None)
+            available_ports = watcher.ports if watcher is not None else None
+            if watcher is not None:
+                watcher.request_rescan()
+        if available_ports is None:
+            available_ports = [port.device for port in serial.tools.list_ports.comports()]
 
         # Atualiza o QComboBox da porta Serial de Comando
         if hasattr(self, 'serial_command_port_combobox') and self.serial_command_port_combobox is not None:
@@ -1512,7 +2838,7 @@ class PlacaTesterApp(QMainWindow):
                     background-color: #4a4a4a;
                     color: #e0e0e0;
                 }
-                QTextEdit#log_text_edit { /* Estilo específico para o terminal no modo escuro */
+                QListView#log_text_edit { /* Estilo específico para o terminal no modo escuro */
                     background-color: #1e1e1e; /* Fundo bem escuro para o terminal */
                     color: #e0e0e0; /* Cor do texto padrão do terminal */
                     border: 1px solid #606060;
@@ -1686,7 +3012,7 @@ class PlacaTesterApp(QMainWindow):
                     padding: 4px;
                     background-color: #fefefe; /* Branco quase bege para inputs */
                 }
-                QTextEdit#log_text_edit { /* Estilo específico para o terminal no modo claro */
+                QListView#log_text_edit { /* Estilo específico para o terminal no modo claro */
                     background-color: #f8f8f0; /* Bege suave para o fundo do terminal */
                     color: #333333; /* Cor do texto padrão do terminal */
                     border: 1px solid #d0d0d0;
@@ -1760,6 +3086,8 @@ class PlacaTesterApp(QMainWindow):
                     color: #333333;
                 }
             """)
+        if getattr(self, "terminal_log_model", None) is not None:
+            self.terminal_log_model.set_colors(self.LOG_COLORS)
 
     def _initialize_command_lines(self, num_lines):
         """
@@ -1918,9 +3246,8 @@ class PlacaTesterApp(QMainWindow):
 
         # Painel esquerdo (log de comunicação e envio de comandos)
         left_panel = QVBoxLayout()
-        self.log_text_edit = QTextEdit()
+        self.log_text_edit = TerminalLogView(self.terminal_log_model)
         self.log_text_edit.setObjectName("log_text_edit") # Adiciona objectName para QSS
-        self.log_text_edit.setReadOnly(True) # Torna o log somente leitura
         
         # Define a cor de fundo do terminal para se adaptar ao tema do sistema
         # A cor de fundo será definida pelo stylesheet, então removemos a definição via palette aqui
@@ -2530,13 +3857,11 @@ class PlacaTesterApp(QMainWindow):
         creator_terminal_layout.setSpacing(6)
         creator_terminal_layout.addWidget(QLabel("Terminal de Apoio"))
 
-        self.test_creator_log_text_edit = QTextEdit()
+        self.test_creator_log_text_edit = TerminalLogView(self.terminal_log_model)
         self.test_creator_log_text_edit.setObjectName("log_text_edit")
-        self.test_creator_log_text_edit.setReadOnly(True)
         self.test_creator_log_text_edit.setStyleSheet("font-size: 14px; font-family: 'Consolas', 'Courier New', monospace; border: 1px solid #d0d0d0; border-radius: 4px;")
         self.test_creator_log_text_edit.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.test_creator_log_text_edit.customContextMenuRequested.connect(self._show_test_creator_log_context_menu)
-        self.test_creator_log_text_edit.setHtml(self.log_text_edit.toHtml())
         creator_terminal_layout.addWidget(self.test_creator_log_text_edit)
 
         # Grupo para configurações de comunicação do teste
@@ -5426,21 +6751,77 @@ class PlacaTesterApp(QMainWindow):
 
         if target_ser and target_ser.is_open:
             try:
-                target_ser.reset_input_buffer() # Limpa o buffer de entrada antes de enviar
-                
-                # Adiciona uma linha vazia antes do envio
-                self.log_message("\n", "informacao") 
-                target_ser.write(command.encode()) # Envia o comando codificado
-                self.log_message(f"Enviado ({target_name}): {command.strip()}", "enviado", target_name)
+                self._queue_terminal_command(
+                    target_ser, target_name, command, SerialWriterThread.PRIORITY_MANUAL,
+                    lambda e: self._show_send_error(target_name, e),
+                )
                 self.direct_command_input.clear() # Limpa o campo de entrada
-            except serial.SerialException as e:
-                QMessageBox.critical(self, "Erro de Envio", f"Erro ao enviar comando:\n{e}\nConexão pode ter sido perdida.")
-                self._handle_connection_lost(target_name)
             except Exception as e:
-                QMessageBox.critical(self, "Erro de Envio", f"Ocorreu um erro inesperado ao enviar o comando:\n{e}")
+                self._show_send_error(target_name, e)
         else:
             QMessageBox.warning(self, "Erro de Envio", f"Conecte-se à porta {target_name} primeiro.")
 
+    def _port_writer(self, ser_instance, port_name):
+        """
+        Fila de escrita (SerialWriterThread) da porta: criada na primeira escrita e refeita
+        quando a porta é reaberta (a thread anterior encerra ao ver a porta fechada).
+        """
+        for key, writer in list(self._port_writers.items()):
+            if writer.isFinished() and not writer._futures:
+                del self._port_writers[key]
+        writer = self._port_writers.get(id(ser_instance))
+        if writer is None or writer.ser is not ser_instance or writer.isFinished():
+            writer = SerialWriterThread(ser_instance, port_name, self.write_inter_frame_gap_ms, self.write_turnaround_ms)
+            self._port_writers[id(ser_instance)] = writer
+            writer.start()
+        return writer
+
+    def _configure_port_writers(self, inter_frame_gap_ms, turnaround_ms):
+        """Intervalo mínimo entre quadros e tempo de retorno RS-485 (ms) de todas as filas de escrita."""
+        try:
+            self.write_inter_frame_gap_ms = max(0, int(inter_frame_gap_ms))
+            self.write_turnaround_ms = max(0, int(turnaround_ms))
+        except (TypeError, ValueError):
+            self.write_inter_frame_gap_ms = 0
+            self.write_turnaround_ms = 0
+        for writer in self._port_writers.values():
+            writer.set_pacing(self.write_inter_frame_gap_ms, self.write_turnaround_ms)
+
+    def _queue_terminal_command(self, target_ser, target_name, command, priority, on_error):
+        """
+        Envia um comando do terminal pela fila de escrita da porta, sem bloquear a interface.
+        'Enviado' é registrado quando a escrita termina; on_error(exceção) trata a falha.
+        """
+        # Adiciona uma linha vazia antes do envio
+        self.log_message("\n", "informacao")
+
+        def on_written(future):
+            error = future.result()["error"]
+            if error is not None:
+                on_error(error)
+                return
+            self.log_message(f"Enviado ({target_name}): {command.strip()}", "enviado", target_name)
+
+        # Limpa o buffer de entrada na thread de escrita, logo antes do envio do quadro
+        self._port_writer(target_ser, target_name).submit(command.encode(), priority, reset_input=True).add_done_callback(on_written)
+
+    def _show_send_error(self, target_name, error):
+        if isinstance(error, serial.SerialException):
+            QMessageBox.critical(self, "Erro de Envio", f"Erro ao enviar comando:\n{error}\nConexão pode ter sido perdida.")
+            self._handle_connection_lost(target_name)
+        else:
+            QMessageBox.critical(self, "Erro de Envio", f"Ocorreu um erro inesperado ao enviar o comando:\n{error}")
+
+    def _handle_auto_send_error(self, index, target_name, error):
+        if isinstance(error, serial.SerialException):
+            self.log_message(f"Erro no auto-envio {index+1}: {error}", "erro")
+        else:
+            self.log_message(f"Erro inesperado no auto-envio {index+1}: {error}", "erro")
+        self.auto_send_timers[index].stop()
+        self.auto_send_checkboxes[index].setChecked(False)
+        if isinstance(error, serial.SerialException):
+            self._handle_connection_lost(target_name)
+
     def _send_command_for_auto_send(self, index):
         """
         Envia um comando de uma das linhas de auto-envio.
@@ -5461,21 +6842,12 @@ class PlacaTesterApp(QMainWindow):
         self._set_reader_mode(target_reader, "serial" if target_name == "Principal" else "modbus")
         if target_ser and target_ser.is_open:
             try:
-                target_ser.reset_input_buffer()
-                
-                # Adiciona uma linha vazia antes do envio
-                self.log_message("\n", "informacao")
-                target_ser.write(command.encode())
-                self.log_message(f"Enviado ({target_name}): {command.strip()}", "enviado", target_name)
-            except serial.SerialException as e:
-                self.log_message(f"Erro no auto-envio {index+1}: {e}", "erro")
-                self.auto_send_timers[index].stop()
-                self.auto_send_checkboxes[index].setChecked(False)
-                self._handle_connection_lost(target_name)
+                self._queue_terminal_command(
+                    target_ser, target_name, command, SerialWriterThread.PRIORITY_AUTO_SEND,
+                    lambda e: self._handle_auto_send_error(index, target_name, e),
+                )
             except Exception as e:
-                self.log_message(f"Erro inesperado no auto-envio {index+1}: {e}", "erro")
-                self.auto_send_timers[index].stop()
-                self.auto_send_checkboxes[index].setChecked(False)
+                self._handle_auto_send_error(index, target_name, e)
         else:
             self.log_message(f"Porta {target_name} não aberta para auto-envio {index+1}.", "erro")
             self.auto_send_timers[index].stop()
@@ -5507,17 +6879,12 @@ class PlacaTesterApp(QMainWindow):
         self._set_reader_mode(target_reader, "serial" if target_name == "Principal" else "modbus")
         if target_ser and target_ser.is_open:
             try:
-                target_ser.reset_input_buffer()
-                
-                # Adiciona uma linha vazia antes do envio
-                self.log_message("\n", "informacao")
-                target_ser.write(command.encode())
-                self.log_message(f"Enviado ({target_name}): {command.strip()}", "enviado", target_name)
-            except serial.SerialException as e:
-                QMessageBox.critical(self, "Erro de Envio", f"Erro ao enviar comando:\n{e}\nConexão pode ter sido perdida.")
-                self._handle_connection_lost(target_name)
+                self._queue_terminal_command(
+                    target_ser, target_name, command, SerialWriterThread.PRIORITY_MANUAL,
+                    lambda e: self._show_send_error(target_name, e),
+                )
             except Exception as e:
-                QMessageBox.critical(self, "Erro de Envio", f"Ocorreu um erro inesperado ao enviar o comando:\n{e}")
+                self._show_send_error(target_name, e)
         else:
             QMessageBox.warning(self, "Erro de Envio", f"Conecte-se à porta {target_name} primeiro.")
 
@@ -5579,12 +6946,54 @@ class PlacaTesterApp(QMainWindow):
             timer.stop()
             self.log_message(f"Auto-envio {index+1} parado.", "informacao")
 
-    def _display_received_data(self, data, source_port_name):
+    def _display_received_data(self, data, source_port_name, rx_ns=None):
         """
         Exibe os dados recebidos no log do terminal.
-        Se a 'data' for uma string vazia, isso representa uma linha em branco
+        'data' pode ser um item (string/bytes) ou uma lista de itens entregue em lote
+        pelo leitor; o lote inteiro é inserido no terminal em uma única edição.
+        'rx_ns' traz o instante de recepção (time.monotonic_ns) de cada item, usado na
+        latência comando -> resposta da porta.
+        Se o item for uma string vazia, isso representa uma linha em branco
         enviada pelo dispositivo, e será logada como tal.
         """
+        items = data if isinstance(data, list) else [data]
+        if rx_ns is None:
+            stamps = [None] * len(items)
+        else:
+            stamps = rx_ns if isinstance(rx_ns, list) else [rx_ns]
+        writer = self._port_writers.get(id(getattr(self.sender(), "ser", None)))
+        entries = []
+        for item, stamp in zip(items, stamps):
+            entry = self._format_received_entry(item, source_port_name)
+            if entry is not None:
+                entries.append(entry + self._received_latency(source_port_name, writer, stamp))
+        if entries:
+            self.log_messages(entries)
+
+        self._check_step_response_wait(source_port_name)
+
+    def _received_latency(self, source_port_name, writer, rx_ns):
+        """
+        Retorna (latência em ms, sufixo do terminal) de um item recebido. A latência é medida
+        desde o último comando escrito na porta antes da recepção; sem comando, é o intervalo
+        desde o item anterior recebido na mesma porta. O terminal mostra a latência só na
+        primeira linha de resposta a cada comando.
+        """
+        if rx_ns is None:
+            return (None, "")
+        previous_rx_ns = self._port_last_rx_ns.get(source_port_name)
+        self._port_last_rx_ns[source_port_name] = rx_ns
+        command_ns = writer.last_write_before(rx_ns) if writer is not None else None
+        if command_ns is None:
+            return (0.0 if previous_rx_ns is None else (rx_ns - previous_rx_ns) / 1e6, "")
+        latency_ms = (rx_ns - command_ns) / 1e6
+        if self._port_answered_write_ns.get(source_port_name) == command_ns:
+            return (latency_ms, "")
+        self._port_answered_write_ns[source_port_name] = command_ns
+        return (latency_ms, f"  [{latency_ms:.1f} ms]")
+
+    def _format_received_entry(self, data, source_port_name):
+        """Retorna (mensagem, tipo, porta) para o terminal a partir de um item recebido."""
         # Se for bytes, exibe como texto quando for imprimivel; senao, usa HEX
         if isinstance(data, (bytes, bytearray)):
             try:
@@ -5600,21 +7009,16 @@ class PlacaTesterApp(QMainWindow):
                 if use_text:
                     txt = data.decode("latin-1", errors="replace")
                     if source_port_name == "Modbus":
-                        self.log_message(f"Recebido (Modbus Texto): {txt}", "recebido", source_port_name)
-                    else:
-                        self.log_message(f"Recebido: {txt}", "recebido", source_port_name)
-                else:
-                    display_data = data.hex().upper()
-                    if source_port_name == "Modbus":
-                        self.log_message(f"Recebido (Modbus): {display_data}", "recebido", source_port_name)
-                    else:
-                        self.log_message(f"Recebido (HEX): {display_data}", "recebido", source_port_name)
+                        return (f"Recebido (Modbus Texto): {txt}", "recebido", source_port_name)
+                    return (f"Recebido: {txt}", "recebido", source_port_name)
+                display_data = data.hex().upper()
+                if source_port_name == "Modbus":
+                    return (f"Recebido (Modbus): {display_data}", "recebido", source_port_name)
+                return (f"Recebido (HEX): {display_data}", "recebido", source_port_name)
             except Exception:
-                pass
-        else: # Se for serial principal (string)
-            self.log_message(f"Recebido: {data}", "recebido", source_port_name) 
-
-        
+                return None
+        # Se for serial principal (string)
+        return (f"Recebido: {data}", "recebido", source_port_name)
 
     def _update_fast_mode_status_label(self):
         """
@@ -5625,19 +7029,40 @@ class PlacaTesterApp(QMainWindow):
         self.log_message(f"Modo Fast {'ATIVADO' if self.fast_mode_active else 'DESATIVADO'}!", "sistema")
 
     def log_message(self, message, msg_type="informacao", source_port=""):
+        self.log_messages([(message, msg_type, source_port)])
+
+    def log_messages(self, entries):
+        """
+        Registra várias mensagens (mensagem, tipo, porta[, latência ms, sufixo do terminal])
+        de uma vez: cada uma passa pelo DataLogger individualmente, mas o terminal recebe
+        uma única inserção e rolagem.
+        """
+        lines = []
+        for entry in entries:
+            full_line = self._prepare_log_line(*entry)
+            if full_line is not None:
+                lines.append(full_line)
+        if lines:
+            self._append_log_lines(lines)
+
+    def _prepare_log_line(self, message, msg_type="informacao", source_port="", latency_ms=None, terminal_suffix=""):
+        """
+        Encaminha a mensagem ao DataLogger e retorna a linha HTML do terminal
+        (ou None se for repetição da linha anterior).
+        latency_ms vem da recepção (comando -> resposta); sem ele, usa o intervalo desde o último evento gravado.
+        """
         # Ignorar mensagens técnicas no terminal
         for prefix in ("Recebido:", "Enviado:", "Comando Enviado:", "Resposta Coletada para Validação:"):
             if message.startswith(prefix):
                 message = message.replace(prefix, "").strip()
                 break
 
-        color = self.LOG_COLORS.get(msg_type, self.LOG_COLORS["informacao"])
-
         ts = datetime.now()
-        if self._datalogger_last_ts is None:
-            latency_ms = 0.0
-        else:
-            latency_ms = (ts - self._datalogger_last_ts).total_seconds() * 1000.0
+        if latency_ms is None:
+            if self._datalogger_last_ts is None:
+                latency_ms = 0.0
+            else:
+                latency_ms = (ts - self._datalogger_last_ts).total_seconds() * 1000.0
 
         datalogger_event = {
             "timestamp": ts,
@@ -5657,48 +7082,48 @@ class PlacaTesterApp(QMainWindow):
             if self.datalogger_enabled and self.datalogger_path:
                 self._datalogger_last_ts = ts
                 try:
-                    self.datalogger_manager.append_event(dict(datalogger_event))
+                    # Apenas enfileira: extração, resolução de linha e gravação rodam na thread do DataLogger
+                    self.datalogger_manager.submit_event(datalogger_event)
                 except Exception:
                     pass
         except Exception:
             pass
 
-        self.log_interaction_count += 1
-        if self.log_interaction_count >= 1500: # Limite de interações para limpar o log
-            self.log_text_edit.clear()
-            self.log_text_edit.append(f"<font color='#AAAAAA'>--- Log Limpo ---</font>")
-            if hasattr(self, "test_creator_log_text_edit") and self.test_creator_log_text_edit is not None:
-                self.test_creator_log_text_edit.clear()
-                self.test_creator_log_text_edit.append(f"<font color='#AAAAAA'>--- Log Limpo ---</font>")
-            self.log_interaction_count = 0
         # Evita inserir mensagens duplicadas consecutivas
-        try:
-            if not hasattr(self, "_last_log_line"):
-                self._last_log_line = ""
-            full_line = f"<font color='{color}'>{message}</font>"
-            if full_line == getattr(self, "_last_log_line", ""):
-                return
-            self._last_log_line = full_line
-        except Exception:
-            pass
-
-        self.log_text_edit.setUpdatesEnabled(False)
-        self.log_text_edit.append(full_line)
-        self.log_text_edit.setUpdatesEnabled(True)
-        self.log_text_edit.verticalScrollBar().setValue(self.log_text_edit.verticalScrollBar().maximum())
-        if hasattr(self, "test_creator_log_text_edit") and self.test_creator_log_text_edit is not None:
-            self.test_creator_log_text_edit.setUpdatesEnabled(False)
-            self.test_creator_log_text_edit.append(full_line)
-            self.test_creator_log_text_edit.setUpdatesEnabled(True)
-            self.test_creator_log_text_edit.verticalScrollBar().setValue(self.test_creator_log_text_edit.verticalScrollBar().maximum())
+        record = (message, msg_type)
+        if record == getattr(self, "_last_log_line", None):
+            return None
+        self._last_log_line = record
+        if terminal_suffix:
+            return (message + terminal_suffix, msg_type)
+        return record
+
+    def _append_log_lines(self, records):
+        """Acrescenta os registros ao histórico compartilhado em uma única inserção."""
+        rows = []
+        for message, msg_type in records:
+            lines = message.split("\n")
+            if len(lines) > 1:
+                lines = [line for line in lines if line.strip()] # "\n--- PASSO ---" vira uma linha só
+            rows.extend((line.rstrip("\r"), msg_type) for line in lines)
+        self.terminal_log_model.append_records(rows)
         
         # Removido: o gatilho baseado no texto do log foi substituído por uma chamada direta em _on_new_dir_detected
         
     def _show_log_context_menu(self, pos):
         """
-        Exibe o menu de contexto para o QTextEdit do log.
+        Exibe o menu de contexto para o terminal.
         """
         context_menu = QMenu(self)
+        copy_action = QAction("Copiar", self)
+        copy_action.triggered.connect(self.log_text_edit.copy_selection)
+        context_menu.addAction(copy_action)
+        search_action = QAction("Buscar...", self)
+        search_action.triggered.connect(lambda: self._search_terminal_log(self.log_text_edit))
+        context_menu.addAction(search_action)
+        counters_action = QAction("Diagnóstico das Portas...", self)
+        counters_action.triggered.connect(self._open_port_counters_dialog)
+        context_menu.addAction(counters_action)
         clear_action = QAction("Limpar Terminal", self)
         clear_action.triggered.connect(self._clear_terminal_log)
         context_menu.addAction(clear_action)
@@ -5709,21 +7134,76 @@ class PlacaTesterApp(QMainWindow):
         Exibe o menu de contexto para o terminal do Criador de Teste.
         """
         context_menu = QMenu(self)
+        copy_action = QAction("Copiar", self)
+        copy_action.triggered.connect(self.test_creator_log_text_edit.copy_selection)
+        context_menu.addAction(copy_action)
+        search_action = QAction("Buscar...", self)
+        search_action.triggered.connect(lambda: self._search_terminal_log(self.test_creator_log_text_edit))
+        context_menu.addAction(search_action)
         clear_action = QAction("Limpar Terminal", self)
         clear_action.triggered.connect(self._clear_terminal_log)
         context_menu.addAction(clear_action)
         context_menu.exec(self.test_creator_log_text_edit.mapToGlobal(pos))
 
+    def _open_port_counters_dialog(self):
+        """Abre (ou traz à frente) o painel não modal de contadores das portas."""
+        if self.port_counters_dialog is None:
+            self.port_counters_dialog = PortCountersDialog(self._collect_port_counters, self)
+            self.port_counters_dialog.finished.connect(self._on_port_counters_dialog_closed)
+        self.port_counters_dialog.show()
+        self.port_counters_dialog.raise_()
+        self.port_counters_dialog.activateWindow()
+
+    def _on_port_counters_dialog_closed(self, _result=None):
+        self.port_counters_dialog = None
+
+    def _collect_port_counters(self):
+        """
+        Contadores de cada porta aberta (Principal, Modbus e portas do teste): leitura pela
+        thread de leitura e escrita pela fila de escrita da mesma instância serial.
+        """
+        readers = [self.serial_command_reader_thread, self.modbus_serial_reader_thread]
+        readers.extend(self.test_runtime_readers.values())
+        rows = []
+        seen = set()
+        for reader in readers:
+            if reader is None or id(reader) in seen:
+                continue
+            seen.add(id(reader))
+            ser_instance = reader.ser
+            if ser_instance is None or not ser_instance.is_open:
+                continue
+            row = {"port": reader.port_name, "system_port": getattr(ser_instance, "port", ""), "mode": reader.read_mode}
+            row.update(reader.get_counters())
+            writer = self._port_writers.get(id(ser_instance))
+            if writer is not None and writer.ser is ser_instance:
+                row.update(writer.get_counters())
+            else:
+                # Nada foi escrito nesta porta ainda
+                row.update({field: 0 for field in PortCounters.TX_FIELDS})
+                row.update({"tx_queue": 0, "last_write_latency_ms": None, "max_write_latency_ms": None})
+            rows.append(row)
+        return rows
+
+    def _search_terminal_log(self, view):
+        """
+        Busca um texto em todo o histórico da sessão (inclusive linhas que já saíram da
+        memória) e posiciona o terminal na próxima ocorrência.
+        """
+        text, ok = QInputDialog.getText(self, "Buscar no Terminal", "Texto:", text=self._terminal_search_text)
+        if not ok or not text:
+            return
+        self._terminal_search_text = text
+        if not view.find_next(text):
+            QMessageBox.information(self, "Buscar no Terminal", f"'{text}' não encontrado no histórico.")
+
     def _clear_terminal_log(self):
         """
-        Limpa o conteúdo do QTextEdit do log.
+        Limpa o histórico do terminal (compartilhado pelos dois terminais).
         """
-        self.log_text_edit.clear()
-        self.log_text_edit.append(f"<font color='#AAAAAA'>--- Terminal Limpo ---</font>")
-        if hasattr(self, "test_creator_log_text_edit") and self.test_creator_log_text_edit is not None:
-            self.test_creator_log_text_edit.clear()
-            self.test_creator_log_text_edit.append(f"<font color='#AAAAAA'>--- Terminal Limpo ---</font>")
-        self.log_interaction_count = 0 # Reseta o contador de interações
+        self.terminal_log_model.clear_records()
+        self.terminal_log_model.append_records([("--- Terminal Limpo ---", "informacao")])
+        self._last_log_line = None
 
     def _default_datalogger_file_path(self):
         base_dir = os.path.join(os.path.expanduser("~"), "Documents", "EmbTechSerial", "DataLogger")
@@ -5787,6 +7267,26 @@ class PlacaTesterApp(QMainWindow):
             self.oled = None
         return self.oled
 
+    def _close_datalogger_writer(self):
+        try:
+            if hasattr(self.datalogger_manager, "stop_worker"):
+                self.datalogger_manager.stop_worker()
+        except Exception as e:
+            self.log_message(f"Falha ao finalizar o arquivo do DataLogger: {e}", "erro")
+
+    def _export_datalogger_to_excel(self, settings, target_path=None):
+        """Exporta usando o gerenciador ativo quando o arquivo é o mesmo (garante o flush das linhas pendentes)."""
+        target = os.path.normcase(os.path.abspath(str(settings.get("file_path", "")).strip()))
+        current = os.path.normcase(os.path.abspath(self.datalogger_path)) if self.datalogger_path else ""
+        if target == current:
+            return self.datalogger_manager.export_to_excel(target_path)
+        return type(self.datalogger_manager)(settings).export_to_excel(target_path)
+
+    def _get_datalogger_runtime_stats(self):
+        if hasattr(self.datalogger_manager, "get_runtime_stats"):
+            return self.datalogger_manager.get_runtime_stats()
+        return {}
+
     def _sync_datalogger_runtime(self):
         self.datalogger_manager.update_settings(self.datalogger_settings)
         self.datalogger_path = str(self.datalogger_settings.get("file_path", "")).strip()
@@ -5814,6 +7314,8 @@ class PlacaTesterApp(QMainWindow):
                 embedded=True,
             )
             panel._embedded_save_handler = self._save_datalogger_settings_from_tab
+            panel._runtime_stats_provider = self._get_datalogger_runtime_stats
+            panel._export_handler = self._export_datalogger_to_excel
 
             tab = QWidget()
             tab_layout = QVBoxLayout(tab)
@@ -5829,8 +7331,8 @@ class PlacaTesterApp(QMainWindow):
 
     def _save_datalogger_settings_from_tab(self, settings):
         self.datalogger_settings = dict(settings or {})
+        # O arquivo só é aberto ao ativar o DataLogger; ativo, a thread de gravação reabre o novo arquivo
         self._sync_datalogger_runtime()
-        self.datalogger_manager.ensure_workbook()
         self._save_settings()
         QMessageBox.information(self, "DataLogger", f"Configuração salva.\nArquivo: {self.datalogger_path}")
 
@@ -5883,9 +7385,11 @@ class PlacaTesterApp(QMainWindow):
                 self.datalogger_manager.ensure_workbook()
                 self._datalogger_last_ts = None
                 self.datalogger_enabled = True
+                self.datalogger_manager.start_worker()
                 self.log_message("DataLogger ATIVADO.", "sistema")
             else:
                 self.datalogger_enabled = False
+                self._close_datalogger_writer()
                 self.log_message("DataLogger DESATIVADO.", "sistema")
         except Exception as e:
             QMessageBox.warning(self, "Erro", f"Falha ao alternar DataLogger:\n{e}")
@@ -6293,6 +7797,8 @@ class PlacaTesterApp(QMainWindow):
         """
         if self.test_in_progress:
             self.test_timer.stop() # Para qualquer timer de timeout ativo
+            self._step_response_wait = None
+            self._cancel_step_task()
             self.test_in_progress = False
             self.log_message("EXECUÇÃO DO TESTE INTERROMPIDA PELO USUÁRIO", "sistema")
             self.test_status_label.setText("Status do Teste: Interrompido")
@@ -6442,42 +7948,8 @@ class PlacaTesterApp(QMainWindow):
                 self._handle_automatic_step_failure(step, error_msg)
                 return
 
-            if step.get("esperar_resposta", False) and target_reader:
-                target_reader.clear_response_buffer_for_next_step()
-
-            try:
-                # Substitui sequências de escape e codifica o comando
-                command_to_send_encoded = command_to_send.replace("\\n", "\n").replace("\\r", "\r").replace("\\t", "\t").encode()
-                target_ser.write(command_to_send_encoded)
-                self.log_message(f"Comando Enviado: '{command_to_send.strip()}'", "enviado")
-                self.test_log_entries.append(f"  Comando Enviado ({target_port_name}): '{command_to_send.strip()}'")
-            except serial.SerialException as e:
-                error_msg = f"Erro de comunicação serial ({target_port_name}): {e}"
-                self.log_message(f"ERRO: Falha ao enviar comando para '{step['nome']}': {e}. Teste falhou neste passo.", "erro")
-                self.test_log_entries.append(f"  ERRO: Falha ao enviar comando: {e}")
-                self._handle_automatic_step_failure(step, error_msg)
-                return
-            except Exception as e:
-                error_msg = f"Erro inesperado: {e}"
-                self.log_message(f"ERRO INESPERADO: Falha ao enviar comando para '{step['nome']}': {e}. Teste falhou neste passo.", "erro")
-                self.test_log_entries.append(f"  ERRO INESPERADO: Falha ao enviar comando: {e}")
-                self._handle_automatic_step_failure(step, error_msg)
-                return
-
-            if step.get("esperar_resposta", False):
-                timeout_ms = int(step.get("timeout_ms", 1000))
-                # Usa QTimer.singleShot estático para não conflitar com outros usos de self.test_timer
-                QTimer.singleShot(max(1, timeout_ms), lambda: self._process_test_response(step, target_reader))
-            else:
-                # Se não espera resposta, o passo é considerado aprovado imediatamente
-                self.log_message(f"APROVADO: '{step['nome']}' (Nenhuma resposta esperada)", "test_pass")
-                step_index = self.current_test_steps.index(step) + 1
-                self.test_log_entries.append(f"  Status: PASSO {step_index}: APROVADO")
-                self.passed_steps_count += 1
-                step["auto_retry_attempts"] = 0
-                self._update_list_item_status(step, "APROVADO", QColor("#32CD32"))
-                self.current_test_index += 1
-                QTimer.singleShot(100, self._execute_next_test_step) # Avança para o próximo passo
+            transport = SerialPortTransport(self, target_ser, target_reader, target_port_name, self._port_writer(target_ser, target_port_name))
+            self._start_step_task(step, self._run_command_step(step, transport, command_to_send))
 
         elif step_type == "instrucao_manual":
             instruction_message = step.get("mensagem_instrucao", "Nenhuma instrução fornecida.")
@@ -6556,182 +8028,11 @@ class PlacaTesterApp(QMainWindow):
                 return
 
             self.test_log_entries.append(f"  Tipo: Comando Modbus")
-
-            all_passed = True
-            overall_error_msg = ""
-
-            def finish_step():
-                if all_passed:
-                    self.log_message(f"APROVADO: '{step['nome']}' (Comando Modbus e validação concluídos com sucesso)", "test_pass")
-                    step_index = self.current_test_steps.index(step) + 1
-                    self.test_log_entries.append(f"  Status: PASSO {step_index}: APROVADO")
-                    self.passed_steps_count += 1
-                    self._update_list_item_status(step, "APROVADO", QColor("#32CD32"))
-                else:
-                    self.log_message(f"REPROVADO: '{step['nome']}' (Falha no comando Modbus ou validação: {overall_error_msg})", "test_fail")
-                    step_index = self.current_test_steps.index(step) + 1
-                    self.test_log_entries.append(f"  Status: PASSO {step_index}: REPROVADO")
-                    self.test_log_entries.append(f"  Detalhe do Erro: {overall_error_msg}")
-                    self.failed_steps_count += 1
-                    self._update_list_item_status(step, "REPROVADO", QColor("#FF4500"), overall_error_msg)
-
-                if self._is_shared_port_open():
-                    self._set_reader_mode(self.serial_command_reader_thread, "serial")
-
-                self.current_test_index += 1
-                QTimer.singleShot(100, self._execute_next_test_step)
-
-            def process_entry(i: int):
-                nonlocal all_passed, overall_error_msg
-                if not self.test_in_progress:
-                    return
-                if i >= len(modbus_params_list):
-                    finish_step()
-                    return
-
-                entry = modbus_params_list[i]
-                slave_id = entry.get("slave_id", 1)
-                function_code_display = entry.get("function_code_display", "Read Holding Registers (0x03)")
-                function_code_hex = entry.get("function_code", "03")
-                address = entry.get("address", 0)
-                quantity = entry.get("quantity", 1)
-                write_value = entry.get("write_value")
-                value_type = entry.get("value_type")
-                expected_value = entry.get("expected_value")
-                min_limit = entry.get("min_limit")
-                max_limit = entry.get("max_limit")
-
-                self.log_message(f"  Executando Modbus (Linha {i+1}): {function_code_display} End: {address}, Qtd: {quantity}", "informacao")
-                self.test_log_entries.append(f"    Modbus (Linha {i+1}): {function_code_display} End: {address}, Qtd: {quantity}")
-                self._set_reader_mode(modbus_target_reader, "modbus")
-
-                try:
-                    determined_value_format = None
-                    if write_value:
-                        if write_value.lower().startswith("0x"):
-                            determined_value_format = "HEX"
-                        elif write_value.lower().startswith("0b"):
-                            determined_value_format = "BIN"
-                        else:
-                            determined_value_format = "DEC Unsigned"
-
-                    if "Write" in function_code_display:
-                        if not write_value:
-                            raise ValueError("Valor para escrita é obrigatório para funções de escrita.")
-                        request_bytes = modbus_lib.build_modbus_rtu_request(
-                            slave_id=slave_id,
-                            function_code_hex=function_code_hex,
-                            address=address,
-                            quantity_or_value_str=write_value,
-                            value_type=value_type,
-                            value_format=determined_value_format
-                        )
-                    else:
-                        request_bytes = modbus_lib.build_modbus_rtu_request(
-                            slave_id=slave_id,
-                            function_code_hex=function_code_hex,
-                            address=address,
-                            quantity_or_value_str=str(quantity),
-                            value_type=value_type
-                        )
-
-                    modbus_target_ser.write(request_bytes)
-                    self.log_message(f"    Comando Modbus Enviado: {request_bytes.hex().upper()}", "enviado")
-                    self.test_log_entries.append(f"      Comando Enviado: {request_bytes.hex().upper()}")
-
-                except Exception as e:
-                    all_passed = False
-                    overall_error_msg = f"Modbus (Linha {i+1}): Erro na preparação/envio: {e}"
-                    finish_step()
-                    return
-
-                # Agenda leitura/validação sem bloquear a UI
-                def on_response_timeout():
-                    nonlocal all_passed, overall_error_msg
-                    try:
-                        response_data = modbus_target_reader.get_buffered_response() if modbus_target_reader else b""
-                        if response_data:
-                            self.log_message(f"    Resposta Modbus Recebida:\n'{response_data.hex().upper()}'", "recebido")
-                            self.test_log_entries.append(f"      Resposta Recebida: '{response_data.hex().upper()}'")
-                        else:
-                            self.log_message(f"    Nenhuma resposta Modbus recebida (Linha {i+1}).", "informacao")
-                            self.test_log_entries.append(f"      Resposta Recebida: Nenhuma (Linha {i+1})")
-                            all_passed = False
-                            overall_error_msg = f"Modbus (Linha {i+1}): Nenhuma resposta recebida."
-                            finish_step()
-                            return
-
-                        success, message, extracted_value = modbus_lib.parse_modbus_rtu_response(
-                            response_data,
-                            function_code_hex,
-                            quantity,
-                            value_type,
-                            "HEX"
-                        )
-
-                        if not success:
-                            all_passed = False
-                            overall_error_msg = f"Modbus (Linha {i+1}): Erro de parsing da resposta: {message}"
-                            finish_step()
-                            return
-
-                        if "Read" in function_code_display:
-                            if extracted_value is not None:
-                                if expected_value:
-                                    if isinstance(extracted_value, list):
-                                        extracted_value_str = "[" + ", ".join(map(str, extracted_value)) + "]"
-                                        if extracted_value_str != expected_value:
-                                            all_passed = False
-                                            overall_error_msg = f"Modbus (Linha {i+1}): Valor(es) esperado(s) '{expected_value}', mas recebeu '{extracted_value_str}'."
-                                            finish_step()
-                                            return
-                                    else:
-                                        if str(extracted_value) != expected_value:
-                                            all_passed = False
-                                            overall_error_msg = f"Modbus (Linha {i+1}): Valor esperado '{expected_value}', mas recebeu '{extracted_value}'."
-                                            finish_step()
-                                            return
-
-                                if min_limit is not None and max_limit is not None:
-                                    values_to_check = extracted_value if isinstance(extracted_value, list) else [extracted_value]
-                                    for val in values_to_check:
-                                        try:
-                                            num_val = float(val)
-                                            if not (min_limit <= num_val <= max_limit):
-                                                all_passed = False
-                                                overall_error_msg = f"Modbus (Linha {i+1}): Valor '{num_val}' fora da faixa esperada [{min_limit}, {max_limit}]."
-                                                finish_step()
-                                                return
-                                        except ValueError:
-                                            all_passed = False
-                                            overall_error_msg = f"Modbus (Linha {i+1}): Não foi possível converter '{val}' para número para validação de faixa."
-                                            finish_step()
-                                            return
-                            else:
-                                all_passed = False
-                                overall_error_msg = f"Modbus (Linha {i+1}): Nenhum valor extraído para validação."
-                                finish_step()
-                                return
-
-                        self.log_message(f"    Modbus (Linha {i+1}): APROVADO.", "test_pass")
-                        self.test_log_entries.append(f"      Status Linha {i+1}: APROVADO")
-                        # Avança para próxima linha
-                        process_entry(i + 1)
-                    except Exception as e:
-                        all_passed = False
-                        overall_error_msg = f"Modbus (Linha {i+1}): Erro inesperado: {e}"
-                        finish_step()
-
-                # Tempo de espera para resposta: usa timeout da porta ou 5000ms como padrão
-                try:
-                    delay_ms = int(getattr(modbus_target_ser, 'timeout', 5) * 1000) if modbus_target_ser else 5000
-                    delay_ms = max(50, min(delay_ms, 10000))
-                except Exception:
-                    delay_ms = 5000
-                QTimer.singleShot(delay_ms, on_response_timeout)
-
-            # Inicia processamento assíncrono
-            process_entry(0)
+            transport = SerialPortTransport(
+                self, modbus_target_ser, modbus_target_reader, modbus_target_name,
+                self._port_writer(modbus_target_ser, modbus_target_name),
+            )
+            self._start_step_task(step, self._run_modbus_step(step, transport, modbus_params_list))
 
         elif step_type == "gravar_numero_serie":
             # Lê o número de série do settings.json e envia o comando SET_NS=<serial>;
@@ -6744,7 +8045,11 @@ class PlacaTesterApp(QMainWindow):
                 command_to_send = f"SET_NS={serial_number};"
                 self._set_reader_mode(self.serial_command_reader_thread, "serial")
                 # Envia pela porta principal, sem adicionar nova linha
-                self.serial_command_ser.write(command_to_send.encode())
+                self._port_writer(self.serial_command_ser, "Principal").submit(
+                    command_to_send.encode(), SerialWriterThread.PRIORITY_TEST
+                ).add_done_callback(
+                    lambda f: f.result()["error"] is not None and self.log_message(f"ERRO: Falha ao gravar número de série: {f.result()['error']}", "erro")
+                )
                 self.log_message(f"Comando Enviado: '{command_to_send}'", "enviado")
                 self.test_log_entries.append(f"  Comando Enviado (Gravar NS): '{command_to_send}'")
                 # Aprova imediatamente, sem esperar resposta
@@ -7270,10 +8575,261 @@ class PlacaTesterApp(QMainWindow):
         self.current_test_index += 1
         QTimer.singleShot(100, self._execute_next_test_step)
 
-    def _process_test_response(self, step_config, reader_thread):
+    def _start_step_task(self, step, coro):
+        """Executa a corrotina do passo no loop do Qt; um erro inesperado reprova o passo."""
+        def on_error(e):
+            self._step_task = None
+            self.log_message(f"ERRO INESPERADO no passo '{step['nome']}': {e}. Teste falhou neste passo.", "erro")
+            self.test_log_entries.append(f"  ERRO INESPERADO: {e}")
+            self._handle_automatic_step_failure(step, f"Erro inesperado: {e}")
+
+        self._step_task = QtTask(coro, on_error=on_error)
+
+    def _cancel_step_task(self):
+        if self._step_task is not None:
+            self._step_task.cancel()
+            self._step_task = None
+
+    async def _run_command_step(self, step, transport, command_to_send):
+        """
+        Passo comando/validação: envia o comando, aguarda a resposta (conclui antes do
+        timeout se a resposta parcial já passa na validação) e valida.
+        """
+        try:
+            # Substitui sequências de escape e codifica o comando
+            command_to_send_encoded = command_to_send.replace("\\n", "\n").replace("\\r", "\r").replace("\\t", "\t").encode()
+            # Resposta = tudo o que chegou a partir da escrita, inclusive respostas muito rápidas
+            await transport.write(command_to_send_encoded)
+            self.log_message(f"Comando Enviado: '{command_to_send.strip()}'", "enviado")
+            self.test_log_entries.append(f"  Comando Enviado ({transport.port_name}): '{command_to_send.strip()}'")
+        except serial.SerialException as e:
+            error_msg = f"Erro de comunicação serial ({transport.port_name}): {e}"
+            self.log_message(f"ERRO: Falha ao enviar comando para '{step['nome']}': {e}. Teste falhou neste passo.", "erro")
+            self.test_log_entries.append(f"  ERRO: Falha ao enviar comando: {e}")
+            self._handle_automatic_step_failure(step, error_msg)
+            return
+        except Exception as e:
+            error_msg = f"Erro inesperado: {e}"
+            self.log_message(f"ERRO INESPERADO: Falha ao enviar comando para '{step['nome']}': {e}. Teste falhou neste passo.", "erro")
+            self.test_log_entries.append(f"  ERRO INESPERADO: Falha ao enviar comando: {e}")
+            self._handle_automatic_step_failure(step, error_msg)
+            return
+
+        if not step.get("esperar_resposta", False):
+            # Se não espera resposta, o passo é considerado aprovado imediatamente
+            self.log_message(f"APROVADO: '{step['nome']}' (Nenhuma resposta esperada)", "test_pass")
+            step_index = self.current_test_steps.index(step) + 1
+            self.test_log_entries.append(f"  Status: PASSO {step_index}: APROVADO")
+            self.passed_steps_count += 1
+            step["auto_retry_attempts"] = 0
+            self._update_list_item_status(step, "APROVADO", QColor("#32CD32"))
+            self.current_test_index += 1
+            QTimer.singleShot(100, self._execute_next_test_step) # Avança para o próximo passo
+            return
+
+        # timeout_ms é só o limite: o passo conclui assim que a resposta recebida já passa na validação
+        timeout_ms = int(step.get("timeout_ms", 1000))
+        response = await transport.read_until(
+            lambda response: isinstance(response, str) and bool(response.strip()) and self._validate_response(response, step)[0],
+            timeout_ms,
+        )
+        self._process_test_response(step, transport.reader, response, transport.response_latency_ms())
+
+    async def _run_modbus_step(self, step, transport, modbus_params_list):
+        """
+        Passo Modbus: executa as linhas em sequência (envia, aguarda o frame de resposta,
+        valida) e para na primeira falha.
+        """
+        error_msg = ""
+        for i, entry in enumerate(modbus_params_list):
+            if not self.test_in_progress:
+                return
+            try:
+                error_msg = await self._run_modbus_entry(i, entry, transport)
+            except Exception as e:
+                error_msg = f"Modbus (Linha {i+1}): Erro inesperado: {e}"
+            if error_msg:
+                break
+        if not self.test_in_progress:
+            return
+
+        step_index = self.current_test_steps.index(step) + 1
+        if not error_msg:
+            self.log_message(f"APROVADO: '{step['nome']}' (Comando Modbus e validação concluídos com sucesso)", "test_pass")
+            self.test_log_entries.append(f"  Status: PASSO {step_index}: APROVADO")
+            self.passed_steps_count += 1
+            self._update_list_item_status(step, "APROVADO", QColor("#32CD32"))
+        else:
+            self.log_message(f"REPROVADO: '{step['nome']}' (Falha no comando Modbus ou validação: {error_msg})", "test_fail")
+            self.test_log_entries.append(f"  Status: PASSO {step_index}: REPROVADO")
+            self.test_log_entries.append(f"  Detalhe do Erro: {error_msg}")
+            self.failed_steps_count += 1
+            self._update_list_item_status(step, "REPROVADO", QColor("#FF4500"), error_msg)
+
+        if self._is_shared_port_open():
+            self._set_reader_mode(self.serial_command_reader_thread, "serial")
+
+        self.current_test_index += 1
+        QTimer.singleShot(100, self._execute_next_test_step)
+
+    async def _run_modbus_entry(self, i, entry, transport):
+        """Executa uma linha Modbus do passo. Retorna a mensagem de erro, ou "" se aprovada."""
+        slave_id = entry.get("slave_id", 1)
+        function_code_display = entry.get("function_code_display", "Read Holding Registers (0x03)")
+        function_code_hex = entry.get("function_code", "03")
+        address = entry.get("address", 0)
+        quantity = entry.get("quantity", 1)
+        write_value = entry.get("write_value")
+        value_type = entry.get("value_type")
+        expected_value = entry.get("expected_value")
+        min_limit = entry.get("min_limit")
+        max_limit = entry.get("max_limit")
+
+        self.log_message(f"  Executando Modbus (Linha {i+1}): {function_code_display} End: {address}, Qtd: {quantity}", "informacao")
+        self.test_log_entries.append(f"    Modbus (Linha {i+1}): {function_code_display} End: {address}, Qtd: {quantity}")
+        self._set_reader_mode(transport.reader, "modbus")
+
+        try:
+            determined_value_format = None
+            if write_value:
+                if write_value.lower().startswith("0x"):
+                    determined_value_format = "HEX"
+                elif write_value.lower().startswith("0b"):
+                    determined_value_format = "BIN"
+                else:
+                    determined_value_format = "DEC Unsigned"
+
+            if "Write" in function_code_display:
+                if not write_value:
+                    raise ValueError("Valor para escrita é obrigatório para funções de escrita.")
+                request_bytes = modbus_lib.build_modbus_rtu_request(
+                    slave_id=slave_id,
+                    function_code_hex=function_code_hex,
+                    address=address,
+                    quantity_or_value_str=write_value,
+                    value_type=value_type,
+                    value_format=determined_value_format
+                )
+            else:
+                request_bytes = modbus_lib.build_modbus_rtu_request(
+                    slave_id=slave_id,
+                    function_code_hex=function_code_hex,
+                    address=address,
+                    quantity_or_value_str=str(quantity),
+                    value_type=value_type
+                )
+
+            await transport.write(request_bytes)
+            self.log_message(f"    Comando Modbus Enviado: {request_bytes.hex().upper()}", "enviado")
+            self.test_log_entries.append(f"      Comando Enviado: {request_bytes.hex().upper()}")
+        except Exception as e:
+            return f"Modbus (Linha {i+1}): Erro na preparação/envio: {e}"
+
+        # Tempo de espera para resposta: usa timeout da porta ou 5000ms como padrão
+        try:
+            delay_ms = int(getattr(transport.ser, 'timeout', 5) * 1000) if transport.ser else 5000
+            delay_ms = max(50, min(delay_ms, 10000))
+        except Exception:
+            delay_ms = 5000
+        # Conclui assim que chega a resposta no tamanho esperado (ou uma exceção), com CRC válido
+        _frame_status, response_data = await transport.read_frame(request_bytes, delay_ms)
+        if not self.test_in_progress:
+            return ""
+
+        if response_data:
+            self.log_message(f"    Resposta Modbus Recebida:\n'{response_data.hex().upper()}'", "recebido")
+            self.test_log_entries.append(f"      Resposta Recebida: '{response_data.hex().upper()}'")
+            latency_ms = transport.response_latency_ms()
+            if latency_ms is not None:
+                self.test_log_entries.append(f"      Latência da Resposta: {latency_ms:.1f} ms")
+        else:
+            self.log_message(f"    Nenhuma resposta Modbus recebida (Linha {i+1}).", "informacao")
+            self.test_log_entries.append(f"      Resposta Recebida: Nenhuma (Linha {i+1})")
+            return f"Modbus (Linha {i+1}): Nenhuma resposta recebida."
+
+        success, message, extracted_value = modbus_lib.parse_modbus_rtu_response(
+            response_data,
+            function_code_hex,
+            quantity,
+            value_type,
+            "HEX"
+        )
+        if not success:
+            return f"Modbus (Linha {i+1}): Erro de parsing da resposta: {message}"
+
+        if "Read" in function_code_display:
+            if extracted_value is None:
+                return f"Modbus (Linha {i+1}): Nenhum valor extraído para validação."
+            if expected_value:
+                if isinstance(extracted_value, list):
+                    extracted_value_str = "[" + ", ".join(map(str, extracted_value)) + "]"
+                    if extracted_value_str != expected_value:
+                        return f"Modbus (Linha {i+1}): Valor(es) esperado(s) '{expected_value}', mas recebeu '{extracted_value_str}'."
+                elif str(extracted_value) != expected_value:
+                    return f"Modbus (Linha {i+1}): Valor esperado '{expected_value}', mas recebeu '{extracted_value}'."
+
+            if min_limit is not None and max_limit is not None:
+                values_to_check = extracted_value if isinstance(extracted_value, list) else [extracted_value]
+                for val in values_to_check:
+                    try:
+                        num_val = float(val)
+                    except ValueError:
+                        return f"Modbus (Linha {i+1}): Não foi possível converter '{val}' para número para validação de faixa."
+                    if not (min_limit <= num_val <= max_limit):
+                        return f"Modbus (Linha {i+1}): Valor '{num_val}' fora da faixa esperada [{min_limit}, {max_limit}]."
+
+        self.log_message(f"    Modbus (Linha {i+1}): APROVADO.", "test_pass")
+        self.test_log_entries.append(f"      Status Linha {i+1}: APROVADO")
+        return ""
+
+    def _arm_step_response_wait(self, reader_thread, timeout_ms, is_complete, on_done):
+        """
+        Aguarda a resposta do passo atual. on_done é chamado uma única vez: assim que
+        is_complete(resposta parcial do leitor) for verdadeiro ou, no máximo, após timeout_ms.
+        """
+        self._step_wait_token += 1
+        token = self._step_wait_token
+        self._step_response_wait = {
+            "token": token,
+            "reader": reader_thread,
+            "is_complete": is_complete,
+            "on_done": on_done,
+        }
+        # Usa QTimer.singleShot estático para não conflitar com outros usos de self.test_timer;
+        # PreciseTimer evita a tolerância de ~5% do timer padrão (grosso) no timeout do passo
+        QTimer.singleShot(max(1, int(timeout_ms)), Qt.TimerType.PreciseTimer, lambda: self._complete_step_response_wait(token))
+        # A escrita termina na thread de escrita: uma resposta rápida pode já estar no buffer
+        if reader_thread is not None:
+            self._check_step_response_wait(reader_thread.port_name)
+
+    def _complete_step_response_wait(self, token):
+        wait = self._step_response_wait
+        if wait is None or wait["token"] != token:
+            return # Já concluído antecipadamente (ou teste interrompido)
+        self._step_response_wait = None
+        wait["on_done"]()
+
+    def _check_step_response_wait(self, source_port_name):
+        """Chamado a cada dado recebido: antecipa a conclusão do passo se a resposta já estiver completa."""
+        wait = self._step_response_wait
+        if wait is None or not self.test_in_progress:
+            return
+        reader_thread = wait["reader"]
+        if reader_thread is None or reader_thread.port_name != source_port_name:
+            return
+        try:
+            complete = wait["is_complete"](reader_thread.peek_buffered_response())
+        except Exception:
+            complete = False
+        if complete:
+            self._complete_step_response_wait(wait["token"])
+
+    def _process_test_response(self, step_config, reader_thread, response_data=None, latency_ms=None):
         """
         Processa a resposta recebida da porta serial para um passo de teste.
         Realiza a validação da resposta e atualiza o status do passo.
+        Sem response_data, lê a resposta acumulada no buffer da thread.
+        latency_ms (comando -> resposta) é registrado no log do teste quando conhecido.
         """
         if not self.test_in_progress:
             return
@@ -7291,18 +8847,17 @@ class PlacaTesterApp(QMainWindow):
             self._finish_test()
             return
 
-        response_data = ""
-        if reader_thread:
+        if response_data is None:
             response_data = reader_thread.get_buffered_response() # Obtém os dados do buffer da thread
-            # Caso venha de porta Modbus mas o conteúdo seja texto (ASCII sobre RS485), converte para string
-            if isinstance(response_data, (bytes, bytearray)):
-                try:
-                    decoded = response_data.decode('utf-8', errors='ignore').strip()
-                    # Usa a string decodificada para validação textual
-                    response_data = decoded
-                except Exception:
-                    # Mantém bytes se não decodificar
-                    pass
+        # Caso venha de porta Modbus mas o conteúdo seja texto (ASCII sobre RS485), converte para string
+        if isinstance(response_data, (bytes, bytearray)):
+            try:
+                decoded = response_data.decode('utf-8', errors='ignore').strip()
+                # Usa a string decodificada para validação textual
+                response_data = decoded
+            except Exception:
+                # Mantém bytes se não decodificar
+                pass
         
         if response_data:
             self.log_message(f"Resposta Coletada para Validação:\n'{response_data}'", "recebido")
@@ -7312,6 +8867,8 @@ class PlacaTesterApp(QMainWindow):
             except Exception:
                 display_resp = response_data
             self.test_log_entries.append(f"  Resposta Recebida ({reader_thread.port_name}): '{display_resp}'")
+            if latency_ms is not None:
+                self.test_log_entries.append(f"  Latência da Resposta: {latency_ms:.1f} ms")
         else:
             self.log_message(f"Nenhuma resposta recebida dentro do timeout para validação.", "informacao")
             self.test_log_entries.append(f"  Resposta Recebida ({reader_thread.port_name}): Nenhuma (Timeout)")
@@ -7634,6 +9191,8 @@ class PlacaTesterApp(QMainWindow):
         """
         self.test_in_progress = False
         self.test_timer.stop()
+        self._step_response_wait = None
+        self._cancel_step_task()
         self.log_message("TESTE CONCLUÍDO", "sistema")
         total_steps = len(self.current_test_steps)
         self.log_message(f"Total de Passos: {total_steps}", "sistema")
@@ -7809,6 +9368,21 @@ class PlacaTesterApp(QMainWindow):
         #self.fast_mode_active = False # Garante que o modo fast seja desativado ao final do teste
         self._update_fast_mode_status_label() # Atualiza o rótulo do modo fast
 
+    def _configure_serial_io_multiplexer(self, enabled):
+        """
+        Liga/desliga a thread única de I/O para as portas abertas a partir de agora.
+        Só tem efeito no Linux; nos demais sistemas cada porta mantém a própria thread.
+        Portas já abertas continuam no modo em que foram iniciadas até serem fechadas.
+        """
+        self.serial_io_multiplexer_enabled = bool(enabled)
+        if self.serial_io_multiplexer_enabled and SerialIOMultiplexer.is_supported():
+            if self.serial_io_multiplexer is None:
+                self.serial_io_multiplexer = SerialIOMultiplexer()
+                self.serial_io_multiplexer.start()
+            SerialReaderThread.multiplexer = self.serial_io_multiplexer
+        else:
+            SerialReaderThread.multiplexer = None
+
     def _save_default_settings(self):
         """
         Salva um novo conjunto de configurações padrão no arquivo 'settings.json'.
@@ -7835,6 +9409,9 @@ class PlacaTesterApp(QMainWindow):
             "last_pr_number": "",
             "last_serial_number": "",
             "datalogger_settings": build_default_datalogger_settings(),
+            "serial_io_multiplexer": False,
+            "write_inter_frame_gap_ms": 0,
+            "write_turnaround_ms": 0,
         }
         try:
             with open(self.settings_file, "w", encoding="utf-8") as f:
@@ -7869,6 +9446,9 @@ class PlacaTesterApp(QMainWindow):
             "last_pr_number": self.current_pr_number,
             "last_serial_number": self.current_serial_number,
             "datalogger_settings": self.datalogger_settings,
+            "serial_io_multiplexer": self.serial_io_multiplexer_enabled,
+            "write_inter_frame_gap_ms": self.write_inter_frame_gap_ms,
+            "write_turnaround_ms": self.write_turnaround_ms,
         }
         for i in range(len(self.send_command_inputs)):
             line_config = {
@@ -7939,6 +9519,8 @@ class PlacaTesterApp(QMainWindow):
             self.current_serial_number = settings.get("last_serial_number", "")
             self.datalogger_settings = settings.get("datalogger_settings", build_default_datalogger_settings())
             self._sync_datalogger_runtime()
+            self._configure_serial_io_multiplexer(settings.get("serial_io_multiplexer", False))
+            self._configure_port_writers(settings.get("write_inter_frame_gap_ms", 0), settings.get("write_turnaround_ms", 0))
             # Carrega configuracoes das linhas de auto-envio
             loaded_lines = settings.get("auto_send_lines", [])
             if len(loaded_lines) > len(self.send_command_inputs):
@@ -8043,10 +9625,10 @@ class PlacaTesterApp(QMainWindow):
         e fechar as portas seriais de forma segura.
         """
         self._save_settings()
+        self._close_datalogger_writer()
         
-         # Pare o timer quando a aplicação for fechada
-        if self.port_monitor_timer.isActive():
-            self.port_monitor_timer.stop()
+        # Para o monitor de portas quando a aplicação for fechada
+        self.port_watcher.stop()
         # Para e limpa as threads de leitura
         if self.serial_command_reader_thread:
             self.serial_command_reader_thread.stop()
@@ -8056,6 +9638,15 @@ class PlacaTesterApp(QMainWindow):
             self.modbus_serial_reader_thread.stop()
             self.modbus_serial_reader_thread = None
 
+        for writer in self._port_writers.values():
+            writer.stop() # Quadros ainda na fila falham; a porta é fechada logo abaixo
+        self._port_writers.clear()
+
+        SerialReaderThread.multiplexer = None
+        if self.serial_io_multiplexer is not None:
+            self.serial_io_multiplexer.stop() # Retira as portas restantes e encerra a thread de I/O
+            self.serial_io_multiplexer = None
+
         # Para todos os timers de auto-envio
         for timer in self.auto_send_timers:
             if timer.isActive():
@@ -8073,6 +9664,9 @@ class PlacaTesterApp(QMainWindow):
                 self.modbus_ser.close()
             except Exception as e:
                 self.log_message(f"Erro ao fechar a porta Modbus em closeEvent: {e}", "erro")
+
+        if self.terminal_scrollback is not None:
+            self.terminal_scrollback.close() # Remove o histórico temporário da sessão
         
         event.accept() # Aceita o evento de fechamento da janela
 
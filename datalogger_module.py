@@ -1,13 +1,20 @@
+import csv
+import json
 import os
+import queue
 import re
-from collections import deque
+import threading
+import time
+from collections import namedtuple
 from copy import deepcopy
 from datetime import datetime
 
+import numpy as np
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.collections import PolyCollection
 from matplotlib.figure import Figure
 from openpyxl import Workbook, load_workbook
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (
     QCheckBox, QComboBox, QDialog, QDialogButtonBox, QFileDialog, QFormLayout,
     QGridLayout, QGroupBox, QHBoxLayout, QLabel, QLineEdit, QMessageBox,
@@ -47,6 +54,7 @@ PRESET_PROFILES = {
     "PRINT_SENSORS EmbTech": {
         "capture_mode": "snapshot",
         "snapshot_window_ms": 1200,
+        "snapshot_start_marker": "---SENSORES----",
         "enabled_types": ["recebido"],
         "sample_type": "recebido",
         "sample_port": "Principal",
@@ -68,7 +76,7 @@ PRESET_PROFILES = {
             {"enabled": True, "header": "Tensao_AC_mV", "column": "S", "message_type": "recebido", "port_filter": "", "regex": r"Tensao AC:\s*([-+]?\d+(?:\.\d+)?)mV", "value_mode": "group1"},
             {"enabled": True, "header": "IAC_mA", "column": "T", "message_type": "recebido", "port_filter": "", "regex": r"IAC:\s*([-+]?\d+(?:\.\d+)?)mA", "value_mode": "group1"},
             {"enabled": True, "header": "I_IHM_mA", "column": "U", "message_type": "recebido", "port_filter": "", "regex": r"I-IHM:\s*([-+]?\d+(?:\.\d+)?)mA", "value_mode": "group1"},
-            {"enabled": True, "header": "Ult_Vol_ml", "column": "V", "message_type": "recebido", "port_filter": "", "regex": r"Ult\\.Vol\\.:\s*([-+]?\d+(?:\.\d+)?)ml", "value_mode": "group1"},
+            {"enabled": True, "header": "Ult_Vol_ml", "column": "V", "message_type": "recebido", "port_filter": "", "regex": r"Ult\.Vol\.:\s*([-+]?\d+(?:\.\d+)?)ml", "value_mode": "group1"},
         ],
     },
     "Sensores EmbTech": {
@@ -104,6 +112,9 @@ PRESET_PROFILES = {
 
 PRESET_RULES = {name: deepcopy(profile["rules"]) for name, profile in PRESET_PROFILES.items()}
 
+DATALOGGER_FILE_FORMATS = (".xlsx", ".csv", ".jsonl")
+DATALOGGER_FILE_FILTER = "Planilhas Excel (*.xlsx);;CSV (*.csv);;JSON Lines (*.jsonl)"
+
 
 def build_default_datalogger_settings():
     return {
@@ -113,7 +124,13 @@ def build_default_datalogger_settings():
         "enabled_types": ["recebido", "enviado"],
         "capture_mode": "event",
         "snapshot_window_ms": 300,
+        "snapshot_start_marker": "",
+        "snapshot_end_marker": "",
         "preview_history_size": 80,
+        "flush_interval_ms": 2000,
+        "flush_max_rows": 200,
+        "queue_max_events": 5000,
+        "write_summary_on_stop": True,
         "preset_name": "Generico",
         "base_columns": {"timestamp": "A", "type": "B", "port": "C", "latency_ms": "D", "message": "E"},
         "rules": deepcopy(PRESET_RULES["Generico"]),
@@ -134,6 +151,14 @@ def _column_index(letter):
     return index
 
 
+def _column_letter(index):
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
 def _to_float(value):
     try:
         return float(str(value).replace(",", "."))
@@ -141,11 +166,337 @@ def _to_float(value):
         return None
 
 
+_REGEX_METACHARS = frozenset(".^$*+?{}[]\\|()")
+
+_CompiledRule = namedtuple("_CompiledRule", "header column message_type port_filter value_mode pattern literal")
+
+
+def _literal_prefix(regex):
+    """Trecho literal que toda correspondência do regex contém (ex.: "sonda 1:"), ou "" se não houver."""
+    if not regex or "|" in regex or regex.startswith("(?"):
+        return ""
+    literal = []
+    index = 1 if regex.startswith("^") else 0
+    while index < len(regex):
+        char, step = regex[index], 1
+        if char == "\\":
+            if index + 1 >= len(regex) or regex[index + 1].isalnum():
+                break
+            char, step = regex[index + 1], 2
+        elif char in _REGEX_METACHARS:
+            break
+        following = regex[index + step:index + step + 1]
+        if following in ("?", "*", "{") or not char.isascii():
+            break
+        literal.append(char)
+        index += step
+        if following == "+":
+            break
+    return "".join(literal).casefold()
+
+
+def _compile_rule(rule):
+    if not rule.get("enabled", True):
+        return None
+    header = str(rule.get("header", "")).strip()
+    column = str(rule.get("column", "")).strip()
+    if not header or not column:
+        return None
+    value_mode = str(rule.get("value_mode", "group1")).strip().lower()
+    regex = str(rule.get("regex", "") or "")
+    pattern = None
+    if value_mode != "message":
+        if not regex:
+            return None
+        pattern = re.compile(regex, re.IGNORECASE)
+    return _CompiledRule(
+        header=header,
+        column=_normalize_column_letter(column),
+        message_type=str(rule.get("message_type", "qualquer")).strip().lower(),
+        port_filter=str(rule.get("port_filter", "")).strip().lower(),
+        value_mode=value_mode,
+        pattern=pattern,
+        literal=_literal_prefix(regex) if pattern is not None else "",
+    )
+
+
+def compile_rule_plan(rules):
+    """
+    Compila as regras uma única vez: regex pré-compilado, prefixo literal para
+    descartar mensagens sem custo de regex e regras já agrupadas por tipo de mensagem.
+    Retorna (plano, erros), onde plano[tipo] é uma tupla imutável de regras.
+    """
+    compiled, errors = [], {}
+    for rule in rules or []:
+        try:
+            item = _compile_rule(rule)
+        except (re.error, ValueError) as exc:
+            errors[str(rule.get("header", "")).strip() or "?"] = str(exc)
+            continue
+        if item is not None:
+            compiled.append(item)
+    generic_types = ("", "qualquer")
+    plan = {"": tuple(rule for rule in compiled if rule.message_type in generic_types)}
+    for msg_type in {rule.message_type for rule in compiled} - set(generic_types):
+        plan[msg_type] = tuple(rule for rule in compiled if rule.message_type in generic_types or rule.message_type == msg_type)
+    return plan, errors
+
+
+def _with_datalogger_extension(path):
+    return path if path.lower().endswith(DATALOGGER_FILE_FORMATS) else path + ".xlsx"
+
+
+def _storage_format(path):
+    extension = os.path.splitext(str(path or "").strip())[1].lower()
+    return extension if extension in DATALOGGER_FILE_FORMATS else ".xlsx"
+
+
+def _summary_path(path, extension):
+    """Arquivo lateral do resumo para formatos de texto: captura.csv -> captura_resumo.csv."""
+    return os.path.splitext(path)[0] + "_resumo" + extension
+
+
+class _XlsxStorage:
+    """Planilha .xlsx mantida em memória e regravada inteira a cada flush."""
+    appends_only = False
+
+    def __init__(self, path, sheet_name, header_row):
+        self.path = path
+        self.header_row = header_row
+        self.workbook = load_workbook(path) if os.path.exists(path) else Workbook()
+        self.worksheet = self.workbook[sheet_name] if sheet_name in self.workbook.sheetnames else self.workbook.active
+        self.worksheet.title = sheet_name
+        self.next_row = max(header_row + 1, self.worksheet.max_row + 1)
+
+    def write_headers(self, layout):
+        for column, header in layout.items():
+            self.worksheet.cell(row=self.header_row, column=column, value=header)
+
+    def write_rows(self, rows, layout):
+        for row, cells in rows:
+            for column, value in cells.items():
+                self.worksheet.cell(row=row, column=column, value=value)
+
+    def write_summary(self, headers, rows):
+        if DATALOGGER_SUMMARY_SHEET in self.workbook.sheetnames:
+            del self.workbook[DATALOGGER_SUMMARY_SHEET]
+        sheet = self.workbook.create_sheet(DATALOGGER_SUMMARY_SHEET)
+        sheet.append(headers)
+        for values in rows:
+            sheet.append(values)
+
+    def save(self):
+        self.workbook.save(self.path)
+
+    def close(self):
+        self.workbook = None
+        self.worksheet = None
+
+
+class _CsvStorage:
+    """CSV somente de acréscimo: cada linha fechada custa o mesmo, seja qual for o tamanho do arquivo."""
+    appends_only = True
+    DELIMITER = ";"  # Excel pt-BR abre ';' direto em colunas
+
+    def __init__(self, path, sheet_name, header_row):
+        self.path = path
+        self.needs_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.handle = open(path, "a", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.handle, delimiter=self.DELIMITER)
+        self.next_row = header_row + 1
+
+    def write_headers(self, layout):
+        if not self.needs_header or not layout:
+            return
+        values = [""] * max(layout)
+        for column, header in layout.items():
+            values[column - 1] = header
+        self.writer.writerow(values)
+        self.needs_header = False
+
+    def write_rows(self, rows, layout):
+        for _, cells in rows:
+            if not cells:
+                continue
+            values = [""] * max(cells)
+            for column, value in cells.items():
+                values[column - 1] = value
+            self.writer.writerow(values)
+
+    def write_summary(self, headers, rows):
+        with open(_summary_path(self.path, ".csv"), "w", newline="", encoding="utf-8-sig") as handle:
+            writer = csv.writer(handle, delimiter=self.DELIMITER)
+            writer.writerow(headers)
+            writer.writerows(rows)
+
+    def save(self):
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+
+class _JsonlStorage:
+    """JSON Lines somente de acréscimo: um objeto {cabecalho: valor} por linha."""
+    appends_only = True
+
+    def __init__(self, path, sheet_name, header_row):
+        self.path = path
+        self.handle = open(path, "a", encoding="utf-8")
+        self.next_row = header_row + 1
+
+    def write_headers(self, layout):
+        return
+
+    def write_rows(self, rows, layout):
+        for _, cells in rows:
+            if not cells:
+                continue
+            record = {layout.get(column, _column_letter(column)): value for column, value in sorted(cells.items())}
+            self.handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def write_summary(self, headers, rows):
+        summary = {values[0]: dict(zip(headers[1:], values[1:])) for values in rows}
+        with open(_summary_path(self.path, ".json"), "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, ensure_ascii=False, indent=2)
+
+    def save(self):
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+
+DATALOGGER_STORAGES = {".xlsx": _XlsxStorage, ".csv": _CsvStorage, ".jsonl": _JsonlStorage}
+
+
+class RunningStats:
+    """
+    Estatística incremental de uma regra (algoritmo de Welford): contagem, mínimo,
+    máximo, média, desvio padrão, último valor e amostras por segundo, sem guardar
+    as amostras.
+    """
+    __slots__ = ("count", "mean", "_m2", "minimum", "maximum", "last", "first_time", "last_time")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.last = None
+        self.first_time = None
+        self.last_time = None
+
+    def add(self, value, when):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None or value < self.minimum else self.minimum
+        self.maximum = value if self.maximum is None or value > self.maximum else self.maximum
+        self.last = value
+        if self.first_time is None:
+            self.first_time = when
+        self.last_time = when
+
+    @property
+    def std(self):
+        return (self._m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+    @property
+    def rate(self):
+        if self.count < 2:
+            return 0.0
+        elapsed = self.last_time - self.first_time
+        return (self.count - 1) / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count, "min": self.minimum, "max": self.maximum, "mean": self.mean,
+            "std": self.std, "last": self.last, "rate": self.rate,
+        }
+
+
+DATALOGGER_SUMMARY_SHEET = "Resumo"
+DATALOGGER_SUMMARY_HEADERS = ["Regra", "Amostras", "Minimo", "Maximo", "Media", "Desvio padrao", "Ultimo", "Amostras/s"]
+DATALOGGER_SUMMARY_KEYS = ("count", "min", "max", "mean", "std", "last", "rate")
+
+
+class PreviewRing:
+    """
+    Histórico de preview de tamanho fixo: arrays NumPy float64 (valor e instante
+    monotônico) com índice circular. Inserção O(1) sem alocar por amostra.
+    """
+    __slots__ = ("values", "timestamps", "_index", "_count")
+
+    def __init__(self, capacity, values=None, timestamps=None):
+        capacity = max(1, int(capacity))
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self._index = 0
+        self._count = 0
+        if values is not None and len(values):
+            values = np.asarray(values, dtype=np.float64)[-capacity:]
+            if timestamps is not None:
+                timestamps = np.asarray(timestamps, dtype=np.float64)[-capacity:]
+            if timestamps is None or len(timestamps) != len(values):
+                timestamps = np.full(len(values), time.monotonic())
+            count = len(values)
+            self.values[:count] = values
+            self.timestamps[:count] = timestamps
+            self._count = count
+            self._index = count % capacity
+
+    @property
+    def capacity(self):
+        return len(self.values)
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value, timestamp=None):
+        self.values[self._index] = value
+        self.timestamps[self._index] = time.monotonic() if timestamp is None else timestamp
+        self._index = (self._index + 1) % len(self.values)
+        if self._count < len(self.values):
+            self._count += 1
+
+    def ordered(self):
+        """Retorna cópias (valores, instantes) em ordem cronológica."""
+        if self._count < len(self.values):
+            return self.values[:self._count].copy(), self.timestamps[:self._count].copy()
+        return (
+            np.concatenate((self.values[self._index:], self.values[:self._index])),
+            np.concatenate((self.timestamps[self._index:], self.timestamps[:self._index])),
+        )
+
+    def summary(self):
+        if not self._count:
+            return None
+        window = self.values[:self._count]
+        return {"min": float(window.min()), "max": float(window.max()), "mean": float(window.mean()), "count": self._count}
+
+
 class PreviewCanvas(FigureCanvas):
+    """
+    Gráfico de preview com artistas persistentes: a linha, a área e o resumo são
+    atualizados com set_data e blitting sobre um fundo em cache. O layout completo
+    só é refeito quando o título muda, os dados saem dos limites atuais ou os limites
+    ficam bem mais largos que os dados.
+    """
+    RESCALE_SPAN_RATIO = 4.0 # Encolhe o eixo Y só quando ele passa deste múltiplo do necessário
+
     def __init__(self):
         self.figure = Figure(figsize=(5.4, 2.1), constrained_layout=False)
         super().__init__(self.figure)
         self.axis = self.figure.add_subplot(111)
+        self._title = None
+        self._line = None
+        self._fill = None
+        self._summary_text = None
+        self._background = None
+        self.mpl_connect("draw_event", self._on_draw)
         self.setMinimumHeight(200)
         self.setMinimumWidth(260)
         self.draw_empty()
@@ -157,23 +508,95 @@ class PreviewCanvas(FigureCanvas):
         self.axis.text(0.5, 0.5, "Sem dados", ha="center", va="center", transform=self.axis.transAxes)
         self.axis.set_xticks([])
         self.axis.set_yticks([])
+        self._title = None
+        self._line = None
+        self._fill = None
+        self._summary_text = None
+        self._background = None
         self.draw_idle()
 
-    def draw_series(self, title, samples):
-        if not samples:
-            self.draw_empty(title)
-            return
+    def _build_series_axes(self, title):
         self.figure.clear()
         self.axis = self.figure.add_subplot(111)
         self.axis.set_title(title, fontsize=10, fontweight="bold")
-        x_vals = list(range(1, len(samples) + 1))
-        y_vals = [item["value"] for item in samples]
-        self.axis.plot(x_vals, y_vals, marker="o", color="#1f77b4", linewidth=1.7)
-        self.axis.fill_between(x_vals, y_vals, color="#9EC5FE", alpha=0.35)
         self.axis.grid(axis="y", linestyle="--", alpha=0.25)
         self.axis.set_xlabel("Amostra")
         self.axis.set_ylabel("Valor")
-        self.draw_idle()
+        (self._line,) = self.axis.plot([], [], marker="o", color="#1f77b4", linewidth=1.7, animated=True)
+        self._summary_text = self.axis.text(
+            0.01, 0.97, "", transform=self.axis.transAxes, fontsize=8, va="top", color="#555555", animated=True,
+        )
+        # Área sob a linha: um único polígono cujos vértices são trocados a cada quadro
+        self._fill = PolyCollection([], facecolors="#9EC5FE", alpha=0.35, animated=True)
+        self.axis.add_collection(self._fill, autolim=False)
+        self._title = title
+
+    @staticmethod
+    def _target_ylim(y_min, y_max):
+        margin = (y_max - y_min) * 0.1 or max(abs(y_max) * 0.1, 1.0)
+        return y_min - margin, y_max + margin
+
+    def _limits_need_update(self, x_max, y_min, y_max):
+        cur_x = self.axis.get_xlim()
+        cur_y = self.axis.get_ylim()
+        if x_max > cur_x[1] or y_min < cur_y[0] or y_max > cur_y[1]:
+            return True
+        # Compara com os limites que seriam aplicados (não com a faixa dos dados), para que
+        # uma série constante não force redesenho a cada quadro; a folga evita oscilar entre escalas.
+        # Ainda evita que um pico antigo achate a série atual indefinidamente.
+        target_low, target_high = self._target_ylim(y_min, y_max)
+        return (cur_y[1] - cur_y[0]) > (target_high - target_low) * self.RESCALE_SPAN_RATIO
+
+    def _apply_limits(self, count, y_min, y_max):
+        x_max = 10
+        while x_max < count:
+            x_max = int(x_max * 1.5) + 1
+        self.axis.set_xlim(0.5, x_max + 0.5)
+        self.axis.set_ylim(*self._target_ylim(y_min, y_max))
+
+    def draw_series(self, title, values, summary=None):
+        if values is None or not len(values):
+            self.draw_empty(title)
+            return
+        full_redraw = False
+        if self._line is None or title != self._title:
+            self._build_series_axes(title)
+            full_redraw = True
+
+        x_vals = np.arange(1, len(values) + 1)
+        y_min, y_max = float(np.min(values)), float(np.max(values))
+        if full_redraw or self._limits_need_update(len(values), y_min, y_max):
+            self._apply_limits(len(values), y_min, y_max)
+            full_redraw = True
+
+        self._line.set_data(x_vals, values)
+        # Mesmo contorno de fill_between(x, y): a curva e a volta pela linha de base y = 0
+        baseline = np.column_stack((x_vals[::-1], np.zeros(len(values))))
+        self._fill.set_verts([np.concatenate((np.column_stack((x_vals, values)), baseline))])
+        self._summary_text.set_text(
+            f"min {summary['min']:g}  max {summary['max']:g}  media {summary['mean']:.4g}" if summary else ""
+        )
+
+        if full_redraw or self._background is None:
+            self._background = None
+            self.draw_idle()
+            return
+        self.restore_region(self._background)
+        self._draw_series_artists()
+        self.blit(self.axis.bbox)
+
+    def _draw_series_artists(self):
+        for artist in (self._fill, self._line, self._summary_text):
+            if artist is not None:
+                self.axis.draw_artist(artist)
+
+    def _on_draw(self, _event):
+        if self._line is None:
+            self._background = None
+            return
+        self._background = self.copy_from_bbox(self.axis.bbox)
+        self._draw_series_artists()
+        self.blit(self.axis.bbox)
 
 
 class DataLoggerHelpDialog(QDialog):
@@ -195,131 +618,514 @@ class DataLoggerHelpDialog(QDialog):
 
 class DataLoggerManager:
     BASE_HEADERS = {"timestamp": "DataHora", "type": "Tipo", "port": "Porta", "latency_ms": "Latencia_ms", "message": "Mensagem"}
+    _STOP_EVENT = object()
+    _SETTINGS_EVENT = object()
 
     def __init__(self, settings=None):
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock() # Só para _rule_stats: a interface lê sem esperar um flush
+        self._queue = None
+        self._pending_settings = None # Configuração que não coube na fila cheia
+        self._settings_version = 0
+        self._applied_settings_version = 0
+        self._worker = None
+        self._stats = self._empty_runtime_stats()
         self.settings = build_default_datalogger_settings()
         self.preview_history = {}
-        self._snapshot_state = {"row": None, "timestamp": None, "port": ""}
+        self._rule_stats = {}
+        self._snapshot_rows = {}
+        self._snapshot_mode = False
+        self._snapshot_window_ms = 300
+        self._frame_markers = ("", "")
+        self._storage = None
+        self._storage_key_open = None
+        self._column_layout = {}
+        self._rule_plan = {}
+        self._rule_cache = {}
+        self.rule_errors = {}
+        self._next_row = None
+        self._pending_rows = {}
+        self._last_flush = time.monotonic()
         self.update_settings(settings or {})
 
     def update_settings(self, settings):
+        """
+        Aplica a nova configuração. Com a thread de gravação ativa, a configuração entra na
+        fila como os eventos (aplicada na ordem, entre dois eventos), sem esperar o lock de um
+        flush em andamento; com a fila cheia, é aplicada antes do próximo evento.
+        """
         merged = build_default_datalogger_settings()
         if isinstance(settings, dict):
             merged.update(settings)
             merged["base_columns"].update(settings.get("base_columns", {}))
             if "rules" in settings:
                 merged["rules"] = deepcopy(settings.get("rules") or [])
-        self.settings = merged
-        self._ensure_preview_buckets()
+        self._settings_version += 1
+        version = self._settings_version
+        event_queue = self._queue
+        if self._worker is not None and self._worker.is_alive() and event_queue is not None:
+            try:
+                event_queue.put_nowait((self._SETTINGS_EVENT, version, merged))
+            except queue.Full:
+                self._pending_settings = (version, merged)
+            return
+        self._apply_settings(version, merged)
+
+    def _apply_pending_settings(self):
+        pending, self._pending_settings = self._pending_settings, None
+        if pending is not None:
+            self._apply_settings(*pending)
+
+    def _apply_settings(self, version, merged):
+        with self._lock:
+            if version < self._applied_settings_version:
+                return # Uma configuração mais nova já foi aplicada
+            self._applied_settings_version = version
+            self.settings = merged
+            self._column_layout = self._build_column_layout()
+            self._rule_plan, self.rule_errors = compile_rule_plan(merged.get("rules"))
+            self._snapshot_mode = str(merged.get("capture_mode", "event")).strip().lower() == "snapshot"
+            self._snapshot_window_ms = max(50, int(merged.get("snapshot_window_ms", 300) or 300))
+            self._frame_markers = (
+                str(merged.get("snapshot_start_marker", "") or "").strip(),
+                str(merged.get("snapshot_end_marker", "") or "").strip(),
+            )
+            self._rule_cache = {}
+            self._ensure_preview_buckets()
+            if self._storage is not None:
+                if self._storage_key_open != self._storage_key():
+                    self.close()
+                else:
+                    self._storage.write_headers(self._column_layout)
+
+    @staticmethod
+    def _empty_runtime_stats():
+        return {
+            "running": False,
+            "queue_depth": 0,
+            "queue_capacity": 0,
+            "max_queue_depth": 0,
+            "submitted_events": 0,
+            "processed_events": 0,
+            "dropped_events": 0,
+            "pending_rows": 0,
+            "flush_count": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "last_error": "",
+        }
+
+    def start_worker(self):
+        """Inicia a thread que processa os eventos enfileirados fora da thread da interface."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._apply_pending_settings()
+        capacity = max(100, int(self.settings.get("queue_max_events", 5000) or 5000))
+        self._queue = queue.Queue(maxsize=capacity)
+        self._stats = self._empty_runtime_stats()
+        self._stats["running"] = True
+        with self._stats_lock:
+            self._rule_stats = {}
+        self._stats["queue_capacity"] = capacity
+        self._worker = threading.Thread(target=self._worker_loop, name="DataLoggerWorker", daemon=True)
+        self._worker.start()
+
+    def stop_worker(self, timeout=5.0):
+        """Esvazia a fila, grava as linhas pendentes e encerra a thread de gravação."""
+        worker, event_queue = self._worker, self._queue
+        if worker is not None and event_queue is not None:
+            try:
+                event_queue.put(self._STOP_EVENT, timeout=timeout)
+            except queue.Full:
+                pass
+            worker.join(timeout)
+        self._worker = None
+        self._queue = None
+        self._stats["running"] = False
+        self._stats["queue_depth"] = 0
+        self._apply_pending_settings()
+        with self._lock:
+            if self.settings.get("write_summary_on_stop", True):
+                self.write_summary()
+            self.close()
+
+    def submit_event(self, event):
+        """Enfileira um evento sem bloquear; retorna False quando a fila está cheia."""
+        event_queue = self._queue
+        if event_queue is None:
+            return False
+        try:
+            event_queue.put_nowait(event)
+        except queue.Full:
+            self._stats["dropped_events"] += 1
+            return False
+        self._stats["submitted_events"] += 1
+        depth = event_queue.qsize()
+        if depth > self._stats["max_queue_depth"]:
+            self._stats["max_queue_depth"] = depth
+        return True
+
+    def _worker_loop(self):
+        event_queue = self._queue
+        while True:
+            try:
+                event = event_queue.get(timeout=0.2)
+            except queue.Empty:
+                event = None
+            if event is self._STOP_EVENT:
+                break
+            try:
+                self._apply_pending_settings()
+                if isinstance(event, tuple) and event[0] is self._SETTINGS_EVENT:
+                    self._apply_settings(event[1], event[2])
+                    continue
+                with self._lock:
+                    if event is not None:
+                        self.append_event(event)
+                        self._stats["processed_events"] += 1
+                    else:
+                        self.flush_if_due()
+            except Exception as exc:
+                self._stats["last_error"] = str(exc)
+
+    def get_runtime_stats(self):
+        stats = dict(self._stats)
+        event_queue = self._queue
+        stats["queue_depth"] = event_queue.qsize() if event_queue is not None else 0
+        stats["pending_rows"] = len(self._pending_rows)
+        stats["rule_stats"] = self.get_rule_stats()
+        return stats
+
+    def get_rule_stats(self):
+        # Lock próprio das estatísticas: a thread da interface não espera um flush em andamento.
+        with self._stats_lock:
+            return {header: item.as_dict() for header, item in self._rule_stats.items()}
+
+    def get_summary_rows(self):
+        rows = []
+        for header, values in self.get_rule_stats().items():
+            rows.append([header] + [values[key] for key in DATALOGGER_SUMMARY_KEYS])
+        return rows
+
+    def write_summary(self):
+        """Grava o resumo estatístico por regra (aba "Resumo" no .xlsx ou arquivo *_resumo ao lado do CSV/JSONL)."""
+        with self._lock:
+            rows = self.get_summary_rows()
+            if not rows or self._storage is None:
+                return False
+            try:
+                self._storage.write_summary(DATALOGGER_SUMMARY_HEADERS, rows)
+                self._storage.save()
+            except Exception as exc:
+                self._stats["last_error"] = str(exc)
+                return False
+            return True
+
+    def _preview_capacity(self):
+        return max(10, int(self.settings.get("preview_history_size", 80) or 80))
 
     def _ensure_preview_buckets(self):
-        history_size = max(10, int(self.settings.get("preview_history_size", 80) or 80))
+        capacity = self._preview_capacity()
         current = dict(self.preview_history)
         self.preview_history = {}
         for rule in self.settings.get("rules", []):
             header = str(rule.get("header", "")).strip()
-            if header:
-                self.preview_history[header] = deque(current.get(header, []), maxlen=history_size)
+            if not header:
+                continue
+            ring = current.get(header)
+            if ring is not None and ring.capacity != capacity:
+                ring = PreviewRing(capacity, *ring.ordered())
+            self.preview_history[header] = ring if ring is not None else PreviewRing(capacity)
 
     def get_preview_state(self):
-        return {"history": {k: [dict(v) for v in values] for k, values in self.preview_history.items()}}
+        with self._lock:
+            history = {}
+            for header, ring in self.preview_history.items():
+                values, timestamps = ring.ordered()
+                history[header] = {"values": values, "timestamps": timestamps}
+            return {"history": history}
 
     def load_preview_state(self, state):
-        history_size = max(10, int(self.settings.get("preview_history_size", 80) or 80))
-        self.preview_history = {
-            str(k): deque((dict(item) for item in values), maxlen=history_size)
-            for k, values in (state or {}).get("history", {}).items()
-        }
-        self._ensure_preview_buckets()
-
-    def ensure_workbook(self):
+        capacity = self._preview_capacity()
+        with self._lock:
+            self.preview_history = {}
+            for header, series in (state or {}).get("history", {}).items():
+                if isinstance(series, dict):
+                    values, timestamps = series.get("values"), series.get("timestamps")
+                else:
+                    # Formato antigo: lista de {"timestamp": str, "value": float}
+                    values, timestamps = [item["value"] for item in series], None
+                self.preview_history[str(header)] = PreviewRing(capacity, values, timestamps)
+            self._ensure_preview_buckets()
+
+    def get_preview_series(self, header):
+        """Retorna (valores em ordem cronológica, resumo min/max/média) de uma regra."""
+        with self._lock:
+            ring = self.preview_history.get(header)
+            if ring is None:
+                return np.empty(0), None
+            return ring.ordered()[0], ring.summary()
+
+    def _storage_key(self):
         path = str(self.settings.get("file_path", "")).strip()
-        if not path:
-            raise ValueError("Nenhum arquivo configurado para o DataLogger.")
-        folder = os.path.dirname(path)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
-        workbook = load_workbook(path) if os.path.exists(path) else Workbook()
         sheet_name = str(self.settings.get("sheet_name", "DataLogger")).strip() or "DataLogger"
-        worksheet = workbook[sheet_name] if sheet_name in workbook.sheetnames else workbook.active
-        worksheet.title = sheet_name
         header_row = max(1, int(self.settings.get("header_row", 1) or 1))
+        return path, sheet_name, header_row
+
+    def _build_column_layout(self):
+        layout = {}
         for key, header in self.BASE_HEADERS.items():
             letter = str(self.settings.get("base_columns", {}).get(key, "")).strip()
             if letter:
-                worksheet[f"{_normalize_column_letter(letter)}{header_row}"] = header
+                try:
+                    layout[_column_index(letter)] = header
+                except ValueError:
+                    continue
         for rule in self.settings.get("rules", []):
             if rule.get("enabled", True) and rule.get("header") and rule.get("column"):
-                worksheet[f"{_normalize_column_letter(rule['column'])}{header_row}"] = str(rule["header"]).strip()
-        workbook.save(path)
+                try:
+                    layout[_column_index(rule["column"])] = str(rule["header"]).strip()
+                except ValueError:
+                    continue
+        return layout
+
+    def _open_storage(self):
+        key = self._storage_key()
+        if self._storage is not None and self._storage_key_open == key:
+            return self._storage
+        self.close()
+        path, sheet_name, header_row = key
+        if not path:
+            raise ValueError("Nenhum arquivo configurado para o DataLogger.")
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        storage = DATALOGGER_STORAGES[_storage_format(path)](path, sheet_name, header_row)
+        self._storage = storage
+        self._storage_key_open = key
+        self._next_row = storage.next_row
+        self._last_flush = time.monotonic()
+        storage.write_headers(self._column_layout)
+        return storage
+
+    def ensure_workbook(self):
+        with self._lock:
+            self._open_storage()
+            self.flush(force=True)
+
+    def _take_flushable_rows(self, final):
+        held_rows = set()
+        if not final and self._storage.appends_only:
+            held_rows = self._open_snapshot_rows()
+        rows = [(row, cells) for row, cells in self._pending_rows.items() if row not in held_rows]
+        self._pending_rows = {row: cells for row, cells in self._pending_rows.items() if row in held_rows}
+        if self._storage.appends_only and rows:
+            # Linha já gravada em arquivo só de acréscimo não pode mais receber mensagens
+            written = {row for row, _ in rows}
+            self._snapshot_rows = {port: state for port, state in self._snapshot_rows.items() if state["row"] not in written}
+        return rows
+
+    def _open_snapshot_rows(self):
+        # Em arquivos só de acréscimo a linha de cada snapshot em aberto fica em memória até fechar
+        if not self._snapshot_mode:
+            return set()
+        if any(self._frame_markers):
+            return {state["row"] for state in self._snapshot_rows.values()}
+        now = datetime.now()
+        return {
+            state["row"] for state in self._snapshot_rows.values()
+            if (now - state["timestamp"]).total_seconds() * 1000.0 <= self._snapshot_window_ms
+        }
+
+    def flush(self, force=False, final=False):
+        """Grava no disco as linhas pendentes mantidas em memória."""
+        with self._lock:
+            if self._storage is None or (not self._pending_rows and not force):
+                return
+            started = time.perf_counter()
+            rows = self._take_flushable_rows(final)
+            self._storage.write_rows(rows, self._column_layout)
+            self._storage.save()
+            self._last_flush = time.monotonic()
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self._stats["flush_count"] += 1
+            self._stats["last_flush_ms"] = elapsed_ms
+            self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+
+    def flush_if_due(self):
+        if not self._pending_rows:
+            return False
+        max_rows = max(1, int(self.settings.get("flush_max_rows", 200) or 200))
+        interval_ms = max(0, int(self.settings.get("flush_interval_ms", 2000) or 0))
+        elapsed_ms = (time.monotonic() - self._last_flush) * 1000.0
+        if len(self._pending_rows) < max_rows and elapsed_ms < interval_ms:
+            return False
+        self.flush()
+        return True
+
+    def close(self):
+        """Descarrega as linhas pendentes e libera o arquivo mantido aberto."""
+        with self._lock:
+            storage = self._storage
+            try:
+                self.flush(final=True)
+            finally:
+                if storage is not None:
+                    storage.close()
+                self._storage = None
+                self._storage_key_open = None
+                self._next_row = None
+                self._pending_rows = {}
+                self._snapshot_rows = {}
+
+    def export_to_excel(self, target_path=None):
+        """
+        Converte o arquivo CSV/JSONL do DataLogger em .xlsx (openpyxl em modo write-only).
+        Sem target_path usa <arquivo>.xlsx, mas não sobrescreve uma planilha existente.
+        """
+        with self._lock:
+            path, sheet_name, header_row = self._storage_key()
+            file_format = _storage_format(path)
+            if file_format == ".xlsx":
+                raise ValueError("O DataLogger já grava em Excel (.xlsx).")
+            if not os.path.exists(path):
+                raise ValueError(f"Arquivo do DataLogger não encontrado:\n{path}")
+            if self._storage_key_open and self._storage_key_open[0] == path:
+                self.flush()
+            layout = dict(self._column_layout)
+        if not target_path:
+            target_path = os.path.splitext(path)[0] + ".xlsx"
+            if os.path.exists(target_path):
+                raise ValueError(f"A planilha já existe e não foi sobrescrita:\n{target_path}")
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet_name)
+        for _ in range(header_row - 1):
+            worksheet.append([])
+        if file_format == ".csv":
+            with open(path, newline="", encoding="utf-8-sig") as handle:
+                for values in csv.reader(handle, delimiter=_CsvStorage.DELIMITER):
+                    worksheet.append(values)
+        else:
+            columns = {header: column for column, header in layout.items()}
+            for record in self._iter_jsonl(path):
+                for key in record:
+                    if key not in columns:
+                        columns[key] = max(columns.values(), default=0) + 1
+            width = max(columns.values(), default=0)
+            header_values = [""] * width
+            for header, column in columns.items():
+                header_values[column - 1] = header
+            worksheet.append(header_values)
+            for record in self._iter_jsonl(path):
+                values = [None] * width
+                for key, value in record.items():
+                    values[columns[key] - 1] = value
+                worksheet.append(values)
+        workbook.save(target_path)
+        return target_path
+
+    @staticmethod
+    def _iter_jsonl(path):
+        with open(path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
 
     def _event_enabled(self, event):
         enabled = set(self.settings.get("enabled_types") or [])
         return not enabled or str(event.get("msg_type", "")).strip().lower() in enabled
 
+    def _rules_for(self, msg_type, port):
+        key = (msg_type, port)
+        rules = self._rule_cache.get(key)
+        if rules is None:
+            port_lower = port.lower()
+            candidates = self._rule_plan.get(msg_type, self._rule_plan.get("", ()))
+            rules = tuple(rule for rule in candidates if not rule.port_filter or rule.port_filter in port_lower)
+            if len(self._rule_cache) < 256:
+                self._rule_cache[key] = rules
+        return rules
+
     def extract_values(self, event):
         msg = str(event.get("message", "") or "")
-        port = str(event.get("source_port", "") or "")
-        msg_type = str(event.get("msg_type", "") or "").lower()
+        rules = self._rules_for(str(event.get("msg_type", "") or "").lower(), str(event.get("source_port", "") or ""))
+        if not rules:
+            return []
+        folded = msg.casefold()
         extracted = []
-        for rule in self.settings.get("rules", []):
-            if not rule.get("enabled", True):
-                continue
-            header = str(rule.get("header", "")).strip()
-            column = str(rule.get("column", "")).strip()
-            if not header or not column:
-                continue
-            rule_type = str(rule.get("message_type", "qualquer")).strip().lower()
-            if rule_type not in ("", "qualquer", msg_type):
-                continue
-            port_filter = str(rule.get("port_filter", "")).strip()
-            if port_filter and port_filter.lower() not in port.lower():
-                continue
-            value_mode = str(rule.get("value_mode", "group1")).strip().lower()
-            regex = str(rule.get("regex", "") or "")
-            value = ""
-            if value_mode == "message":
+        for rule in rules:
+            if rule.value_mode == "message":
                 value = msg
             else:
-                match = re.search(regex, msg, re.IGNORECASE) if regex else None
+                if rule.literal and rule.literal not in folded:
+                    continue
+                match = rule.pattern.search(msg)
                 if not match:
                     continue
-                value = match.group(0) if value_mode == "match" else (match.group(1) if match.lastindex else match.group(0))
-            extracted.append({"header": header, "column": _normalize_column_letter(column), "value": value, "numeric_value": _to_float(value)})
+                value = match.group(0) if rule.value_mode == "match" else (match.group(1) if match.lastindex else match.group(0))
+            extracted.append({"header": rule.header, "column": rule.column, "value": value, "numeric_value": _to_float(value)})
         return extracted
 
     def _append_preview(self, timestamp, extracted):
-        self._ensure_preview_buckets()
+        now = time.monotonic()
         for item in extracted:
             if item["numeric_value"] is None:
                 continue
-            self.preview_history[item["header"]].append({"timestamp": timestamp.strftime("%H:%M:%S"), "value": item["numeric_value"]})
+            ring = self.preview_history.get(item["header"])
+            if ring is not None:
+                ring.append(item["numeric_value"], now)
+
+    def _resolve_row(self, timestamp, port, message=""):
+        """
+        Retorna a linha do evento. No modo snapshot cada porta tem sua própria janela
+        em aberto no índice em memória, então portas intercaladas não se interrompem.
+        """
+        if not self._snapshot_mode:
+            return self._allocate_row()
+        if any(self._frame_markers):
+            return self._resolve_framed_row(timestamp, port, message)
+        state = self._snapshot_rows.get(port)
+        if state is not None:
+            delta_ms = abs((timestamp - state["timestamp"]).total_seconds() * 1000.0)
+            if delta_ms <= self._snapshot_window_ms:
+                state["timestamp"] = timestamp
+                return state["row"]
+        row = self._allocate_row()
+        self._snapshot_rows[port] = {"row": row, "opened": timestamp, "timestamp": timestamp}
+        return row
 
-    def _resolve_row(self, worksheet, timestamp, port):
-        header_row = max(1, int(self.settings.get("header_row", 1) or 1))
-        if str(self.settings.get("capture_mode", "event")).strip().lower() != "snapshot":
-            return max(header_row + 1, worksheet.max_row + 1)
-        window_ms = max(50, int(self.settings.get("snapshot_window_ms", 300) or 300))
-        if self._snapshot_state["row"] and self._snapshot_state["timestamp"] and self._snapshot_state["port"] == port:
-            delta_ms = abs((timestamp - self._snapshot_state["timestamp"]).total_seconds() * 1000.0)
-            if delta_ms <= window_ms:
-                self._snapshot_state["timestamp"] = timestamp
-                return self._snapshot_state["row"]
-        row = max(header_row + 1, worksheet.max_row + 1)
-        self._snapshot_state = {"row": row, "timestamp": timestamp, "port": port}
+    def _resolve_framed_row(self, timestamp, port, message):
+        # Marcador de início abre uma linha nova (fechando a anterior); marcador de fim fecha a linha atual
+        start_marker, end_marker = self._frame_markers
+        state = self._snapshot_rows.get(port)
+        if state is None or (start_marker and start_marker in message):
+            state = {"row": self._allocate_row(), "opened": timestamp, "timestamp": timestamp}
+            self._snapshot_rows[port] = state
+        state["timestamp"] = timestamp
+        if end_marker and end_marker in message:
+            del self._snapshot_rows[port]
+        return state["row"]
+
+    def _allocate_row(self):
+        row = self._next_row
+        self._next_row += 1
         return row
 
     def append_event(self, event):
+        with self._lock:
+            return self._append_event_locked(event)
+
+    def _append_event_locked(self, event):
         path = str(self.settings.get("file_path", "")).strip()
         if not path or not self._event_enabled(event):
             return []
         timestamp = event.get("timestamp", datetime.now())
         extracted = self.extract_values(event)
         self._append_preview(timestamp, extracted)
-        self.ensure_workbook()
-        workbook = load_workbook(path)
-        worksheet = workbook[str(self.settings.get("sheet_name", "DataLogger")).strip() or "DataLogger"]
-        row = self._resolve_row(worksheet, timestamp, str(event.get("source_port", "") or ""))
+        self._open_storage()
+        row = self._resolve_row(timestamp, str(event.get("source_port", "") or ""), str(event.get("message", "") or ""))
+        cells = self._pending_rows.setdefault(row, {})
         base_columns = self.settings.get("base_columns", {})
         base_values = {
             "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
@@ -331,21 +1137,35 @@ class DataLoggerManager:
         for key, value in base_values.items():
             letter = str(base_columns.get(key, "")).strip()
             if letter:
-                worksheet.cell(row=row, column=_column_index(letter), value=value)
+                cells[_column_index(letter)] = value
+        when = timestamp.timestamp() if isinstance(timestamp, datetime) else time.time()
         for item in extracted:
-            worksheet.cell(row=row, column=_column_index(item["column"]), value=item["value"])
-        workbook.save(path)
+            cells[_column_index(item["column"])] = item["value"]
+            if item["numeric_value"] is not None:
+                with self._stats_lock:
+                    stats = self._rule_stats.get(item["header"])
+                    if stats is None:
+                        stats = self._rule_stats[item["header"]] = RunningStats()
+                    stats.add(item["numeric_value"], when)
+        self.flush_if_due()
         return extracted
 
 
 class DataLoggerConfigDialog(QDialog):
     MESSAGE_TYPES = [("qualquer", "Qualquer"), ("recebido", "Recebido"), ("enviado", "Enviado"), ("sistema", "Sistema"), ("erro", "Erro"), ("informacao", "Informacao")]
     VALUE_MODES = [("group1", "Grupo 1"), ("match", "Match completo"), ("message", "Mensagem completa")]
+    RUNTIME_STAT_LABELS = [
+        ("running", "Estado"), ("queue_depth", "Fila"), ("processed_events", "Processados"),
+        ("dropped_events", "Descartados"), ("pending_rows", "Linhas pendentes"), ("flush", "Ultimo flush"),
+    ]
+    PREVIEW_REDRAW_INTERVAL_MS = 100
 
     def __init__(self, settings=None, preview_state=None, parent=None, embedded=False):
         super().__init__(parent)
         self._embedded = bool(embedded)
         self._embedded_save_handler = None
+        self._export_handler = None
+        self._runtime_stats_provider = None
         self.embedded_save_button = None
         if self._embedded:
             self.setWindowFlags(Qt.WindowType.Widget)
@@ -359,6 +1179,10 @@ class DataLoggerConfigDialog(QDialog):
             self._settings["rules"] = deepcopy(settings.get("rules", self._settings["rules"]))
         self._preview_manager = DataLoggerManager(self._settings)
         self._preview_manager.load_preview_state(preview_state or {})
+        # Versão das regras/formulário: só é incrementada por sinais de edição,
+        # e o preview só recoleta a tabela quando ela muda.
+        self._preview_settings_version = 0
+        self._preview_settings_applied = -1
         self._init_ui()
         self._load_settings()
         self._refresh_preview_rule_combo()
@@ -416,20 +1240,30 @@ class DataLoggerConfigDialog(QDialog):
         self.file_path_input = QLineEdit()
         choose_button = QPushButton("Escolher arquivo...")
         choose_button.clicked.connect(self._choose_file)
+        self.export_button = QPushButton("Exportar para Excel")
+        self.export_button.setToolTip("Converte o arquivo CSV/JSONL do DataLogger em uma planilha .xlsx")
+        self.export_button.clicked.connect(self._export_to_excel)
         self.sheet_name_input = QLineEdit()
         self.header_row_spin = QSpinBox(); self.header_row_spin.setRange(1, 9999)
         self.capture_mode_combo = QComboBox(); self.capture_mode_combo.addItem("Evento por linha", "event"); self.capture_mode_combo.addItem("Snapshot consolidado", "snapshot")
         self.snapshot_window_spin = QSpinBox(); self.snapshot_window_spin.setRange(50, 10000); self.snapshot_window_spin.setSuffix(" ms")
+        self.capture_mode_combo.currentIndexChanged.connect(self._invalidate_preview_settings)
+        self.snapshot_window_spin.valueChanged.connect(self._invalidate_preview_settings)
+        self.snapshot_start_input = QLineEdit(); self.snapshot_start_input.setPlaceholderText("Ex.: ---SENSORES----")
+        self.snapshot_end_input = QLineEdit(); self.snapshot_end_input.setPlaceholderText("Opcional")
+        self.snapshot_start_input.setToolTip("No modo snapshot, a mensagem que contém este texto abre uma linha nova (a janela de tempo é ignorada).")
+        self.snapshot_end_input.setToolTip("No modo snapshot, a mensagem que contém este texto fecha a linha atual (a janela de tempo é ignorada).")
         self.preset_combo = QComboBox(); self.preset_combo.addItem("Personalizado"); [self.preset_combo.addItem(name) for name in PRESET_RULES.keys()]
         preset_button = QPushButton("Aplicar preset"); preset_button.clicked.connect(self._apply_preset)
-        self.preset_hint_label = QLabel("Dica: para PRINT_SENSORS use o preset 'PRINT_SENSORS EmbTech'.")
+        self.preset_hint_label = QLabel("Dica: para PRINT_SENSORS use o preset 'PRINT_SENSORS EmbTech'. Para capturas longas use .csv ou .jsonl e exporte para Excel no final.")
         self.preset_hint_label.setWordWrap(True)
         self.preset_hint_label.setStyleSheet("color: #C8C8C8; font-size: 11px;")
-        top_layout.addWidget(QLabel("Arquivo:"), 0, 0); top_layout.addWidget(self.file_path_input, 0, 1, 1, 3); top_layout.addWidget(choose_button, 0, 4)
+        top_layout.addWidget(QLabel("Arquivo:"), 0, 0); top_layout.addWidget(self.file_path_input, 0, 1, 1, 3); top_layout.addWidget(choose_button, 0, 4); top_layout.addWidget(self.export_button, 1, 4)
         top_layout.addWidget(QLabel("Planilha:"), 1, 0); top_layout.addWidget(self.sheet_name_input, 1, 1); top_layout.addWidget(QLabel("Cabecalho:"), 1, 2); top_layout.addWidget(self.header_row_spin, 1, 3)
         top_layout.addWidget(QLabel("Modo:"), 2, 0); top_layout.addWidget(self.capture_mode_combo, 2, 1); top_layout.addWidget(QLabel("Janela snapshot:"), 2, 2); top_layout.addWidget(self.snapshot_window_spin, 2, 3)
-        top_layout.addWidget(QLabel("Preset:"), 3, 0); top_layout.addWidget(self.preset_combo, 3, 1, 1, 2); top_layout.addWidget(preset_button, 3, 3)
-        top_layout.addWidget(self.preset_hint_label, 4, 0, 1, 5)
+        top_layout.addWidget(QLabel("Inicio do frame:"), 3, 0); top_layout.addWidget(self.snapshot_start_input, 3, 1); top_layout.addWidget(QLabel("Fim do frame:"), 3, 2); top_layout.addWidget(self.snapshot_end_input, 3, 3)
+        top_layout.addWidget(QLabel("Preset:"), 4, 0); top_layout.addWidget(self.preset_combo, 4, 1, 1, 2); top_layout.addWidget(preset_button, 4, 3)
+        top_layout.addWidget(self.preset_hint_label, 5, 0, 1, 5)
         content_layout.addWidget(top)
 
         types = QGroupBox("Tipos de evento")
@@ -453,6 +1287,9 @@ class DataLoggerConfigDialog(QDialog):
         self.rules_table = QTableWidget(0, 7)
         self.rules_table.setHorizontalHeaderLabels(["Ativo", "Cabecalho", "Coluna", "Tipo", "Porta", "Regex", "Valor"])
         self.rules_table.horizontalHeader().setStretchLastSection(True)
+        self.rules_table.itemChanged.connect(self._invalidate_preview_settings)
+        self.rules_table.model().rowsInserted.connect(self._invalidate_preview_settings)
+        self.rules_table.model().rowsRemoved.connect(self._invalidate_preview_settings)
         rules_layout.addWidget(self.rules_table)
         row_buttons = QHBoxLayout()
         add_button = QPushButton("Adicionar regra"); add_button.clicked.connect(self._add_rule_row)
@@ -492,6 +1329,40 @@ class DataLoggerConfigDialog(QDialog):
         preview_layout.addWidget(simulate_button, 7, 5, 1, 2)
         content_layout.addWidget(preview, 1)
 
+        runtime = QGroupBox("Desempenho da gravacao")
+        runtime_layout = QGridLayout(runtime)
+        self.runtime_stat_labels = {}
+        for index, (key, label) in enumerate(self.RUNTIME_STAT_LABELS):
+            value_label = QLabel("-")
+            self.runtime_stat_labels[key] = value_label
+            runtime_layout.addWidget(QLabel(label + ":"), index // 3, (index % 3) * 2)
+            runtime_layout.addWidget(value_label, index // 3, (index % 3) * 2 + 1)
+        self.runtime_error_label = QLabel("")
+        self.runtime_error_label.setWordWrap(True)
+        self.runtime_error_label.setStyleSheet("color: #FF6B6B; font-size: 11px;")
+        runtime_layout.addWidget(self.runtime_error_label, 2, 0, 1, 6)
+        self.write_summary_checkbox = QCheckBox("Gravar resumo ao parar")
+        self.write_summary_checkbox.setToolTip("Ao desativar o DataLogger, grava min/max/media/desvio por regra na aba 'Resumo' (.xlsx) ou em <arquivo>_resumo (.csv/.jsonl).")
+        runtime_layout.addWidget(self.write_summary_checkbox, 3, 0, 1, 6)
+        self.rule_stats_table = QTableWidget(0, len(DATALOGGER_SUMMARY_HEADERS))
+        self.rule_stats_table.setHorizontalHeaderLabels(DATALOGGER_SUMMARY_HEADERS)
+        self.rule_stats_table.horizontalHeader().setStretchLastSection(True)
+        self.rule_stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.rule_stats_table.setMinimumHeight(120)
+        runtime_layout.addWidget(self.rule_stats_table, 4, 0, 1, 6)
+        content_layout.addWidget(runtime)
+        self._dirty_preview_canvases = set()
+        self._pending_preview_extracted = None
+        self._preview_redraw_timer = QTimer(self)
+        self._preview_redraw_timer.setSingleShot(True)
+        self._preview_redraw_timer.setInterval(self.PREVIEW_REDRAW_INTERVAL_MS)
+        self._preview_redraw_timer.timeout.connect(self._flush_preview_redraw)
+
+        self._runtime_stats_timer = QTimer(self)
+        self._runtime_stats_timer.setInterval(500)
+        self._runtime_stats_timer.timeout.connect(self._refresh_runtime_stats)
+        self._runtime_stats_timer.start()
+
         scroll_area.setWidget(content)
         root.addWidget(scroll_area, 1)
 
@@ -509,9 +1380,31 @@ class DataLoggerConfigDialog(QDialog):
 
     def _choose_file(self):
         default_name = datetime.now().strftime("EmbTech_DataLogger_%Y%m%d_%H%M%S.xlsx")
-        path, _ = QFileDialog.getSaveFileName(self, "Selecionar arquivo do DataLogger", self.file_path_input.text().strip() or default_name, "Planilhas Excel (*.xlsx)")
+        path, _ = QFileDialog.getSaveFileName(self, "Selecionar arquivo do DataLogger", self.file_path_input.text().strip() or default_name, DATALOGGER_FILE_FILTER)
         if path:
-            self.file_path_input.setText(path if path.lower().endswith(".xlsx") else path + ".xlsx")
+            self.file_path_input.setText(_with_datalogger_extension(path))
+
+    def _export_to_excel(self):
+        try:
+            settings = self.get_settings()
+            if _storage_format(settings["file_path"]) == ".xlsx":
+                raise ValueError("O DataLogger já grava em Excel (.xlsx).")
+            # O diálogo de salvar confirma antes de sobrescrever uma planilha existente
+            suggested_path = os.path.splitext(settings["file_path"])[0] + ".xlsx"
+            target_path, _ = QFileDialog.getSaveFileName(self, "Exportar DataLogger para Excel", suggested_path, "Planilhas Excel (*.xlsx)")
+            if not target_path:
+                return
+            if not target_path.lower().endswith(".xlsx"):
+                target_path += ".xlsx"
+            if callable(self._export_handler):
+                target_path = self._export_handler(settings, target_path)
+            else:
+                target_path = DataLoggerManager(settings).export_to_excel(target_path)
+            QMessageBox.information(self, "DataLogger", f"Planilha exportada:\n{target_path}")
+        except ValueError as exc:
+            QMessageBox.warning(self, "DataLogger", str(exc))
+        except Exception as exc:
+            QMessageBox.warning(self, "DataLogger", f"Falha ao exportar para Excel:\n{exc}")
 
     def _load_help_markdown(self):
         help_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datalogger_help.md")
@@ -538,6 +1431,9 @@ class DataLoggerConfigDialog(QDialog):
         value_combo = QComboBox(); [value_combo.addItem(label, key) for key, label in self.VALUE_MODES]; value_combo.setCurrentIndex(max(0, value_combo.findData(rule.get("value_mode", "group1"))))
         self.rules_table.setCellWidget(row, 3, type_combo); self.rules_table.setItem(row, 4, QTableWidgetItem(str(rule.get("port_filter", ""))))
         self.rules_table.setItem(row, 5, QTableWidgetItem(str(rule.get("regex", "")))); self.rules_table.setCellWidget(row, 6, value_combo)
+        cb.toggled.connect(self._invalidate_preview_settings)
+        type_combo.currentIndexChanged.connect(self._invalidate_preview_settings)
+        value_combo.currentIndexChanged.connect(self._invalidate_preview_settings)
 
     def _remove_selected_rule(self):
         if self.rules_table.currentRow() >= 0:
@@ -557,6 +1453,8 @@ class DataLoggerConfigDialog(QDialog):
         if capture_index >= 0:
             self.capture_mode_combo.setCurrentIndex(capture_index)
         self.snapshot_window_spin.setValue(int(profile.get("snapshot_window_ms", 300) or 300))
+        self.snapshot_start_input.setText(str(profile.get("snapshot_start_marker", "") or ""))
+        self.snapshot_end_input.setText(str(profile.get("snapshot_end_marker", "") or ""))
         self._set_enabled_type_checkboxes(profile.get("enabled_types", ["recebido"]))
         self._load_sample_for_preset(preset_name, force=True)
         self._refresh_preview_rule_combo()
@@ -569,6 +1467,9 @@ class DataLoggerConfigDialog(QDialog):
         self.header_row_spin.setValue(int(self._settings.get("header_row", 1) or 1))
         self.capture_mode_combo.setCurrentIndex(max(0, self.capture_mode_combo.findData(self._settings.get("capture_mode", "event"))))
         self.snapshot_window_spin.setValue(int(self._settings.get("snapshot_window_ms", 300) or 300))
+        self.snapshot_start_input.setText(str(self._settings.get("snapshot_start_marker", "") or ""))
+        self.snapshot_end_input.setText(str(self._settings.get("snapshot_end_marker", "") or ""))
+        self.write_summary_checkbox.setChecked(bool(self._settings.get("write_summary_on_stop", True)))
         preset_index = self.preset_combo.findText(str(self._settings.get("preset_name", "Personalizado"))); self.preset_combo.setCurrentIndex(preset_index if preset_index >= 0 else 0)
         enabled_types = set(self._settings.get("enabled_types") or [])
         for key, cb in self.type_checkboxes.items():
@@ -602,6 +1503,11 @@ class DataLoggerConfigDialog(QDialog):
             }
             if rule["value_mode"] != "message" and not rule["regex"]:
                 raise ValueError(f"Regra '{header}' precisa de regex.")
+            if rule["regex"]:
+                try:
+                    re.compile(rule["regex"])
+                except re.error as exc:
+                    raise ValueError(f"Regex invalido na regra '{header}': {exc}")
             rules.append(rule)
         return rules
 
@@ -613,9 +1519,32 @@ class DataLoggerConfigDialog(QDialog):
         settings["rules"] = self._collect_rules()
         return settings
 
+    def _invalidate_preview_settings(self, *_args):
+        self._preview_settings_version += 1
+
+    def _apply_preview_settings(self, settings):
+        self._preview_manager.update_settings(settings)
+        self._preview_settings_applied = self._preview_settings_version
+
+    def _sync_preview_settings(self):
+        """
+        Reaplica as regras ao gerenciador de preview apenas se houve edição desde
+        a última coleta. Com uma regra incompleta/inválida, mantém as últimas
+        regras válidas até a próxima edição.
+        """
+        if self._preview_settings_applied == self._preview_settings_version:
+            return
+        try:
+            settings = self._collect_preview_settings()
+        except ValueError:
+            self._preview_settings_applied = self._preview_settings_version
+            return
+        self._apply_preview_settings(settings)
+
     def _refresh_preview_rule_combo(self):
         current_values = [combo.currentData() for combo in self.preview_rule_combos]
-        headers = [str(rule["header"]) for rule in self._collect_preview_settings().get("rules", []) if rule.get("header")]
+        self._sync_preview_settings()
+        headers = [str(rule["header"]) for rule in self._preview_manager.settings.get("rules", []) if rule.get("header")]
         for combo in self.preview_rule_combos:
             combo.blockSignals(True)
             combo.clear()
@@ -635,29 +1564,52 @@ class DataLoggerConfigDialog(QDialog):
         self._refresh_all_preview_charts()
 
     def _refresh_preview_chart(self):
-        header = self.preview_rule_combo.currentData()
-        self.preview_canvas.draw_series(header or "Preview", list(self._preview_manager.preview_history.get(header, [])) if header else [])
+        self._redraw_preview_canvas(0)
 
     def _refresh_preview_chart_2(self):
-        header = self.preview_rule_combo_2.currentData()
-        self.preview_canvas_2.draw_series(header or "Preview 2", list(self._preview_manager.preview_history.get(header, [])) if header else [])
+        self._redraw_preview_canvas(1)
 
     def _refresh_preview_chart_3(self):
-        header = self.preview_rule_combo_3.currentData()
-        self.preview_canvas_3.draw_series(header or "Preview 3", list(self._preview_manager.preview_history.get(header, [])) if header else [])
+        self._redraw_preview_canvas(2)
+
+    def _redraw_preview_canvas(self, index):
+        header = self.preview_rule_combos[index].currentData()
+        title = header or ("Preview" if index == 0 else f"Preview {index + 1}")
+        self.preview_canvases[index].draw_series(title, *self._preview_manager.get_preview_series(header))
 
     def _refresh_all_preview_charts(self):
-        self._refresh_preview_chart()
-        self._refresh_preview_chart_2()
-        self._refresh_preview_chart_3()
+        for index in range(len(self.preview_canvases)):
+            self._redraw_preview_canvas(index)
 
     def _refresh_preview_views(self, extracted):
         self._refresh_all_preview_charts()
+        self._set_preview_text(extracted)
+
+    def _set_preview_text(self, extracted):
         self.preview_text.setPlainText("\n".join(f"{item['header']} ({item['column']}): {item['value']}" for item in extracted) or "Nenhuma extração recente.")
 
+    def _schedule_preview_redraw(self, extracted):
+        """Marca os gráficos afetados e agenda um único redesenho por intervalo."""
+        headers = {item["header"] for item in extracted if item.get("numeric_value") is not None}
+        for index, combo in enumerate(self.preview_rule_combos):
+            if combo.currentData() in headers:
+                self._dirty_preview_canvases.add(index)
+        if extracted:
+            self._pending_preview_extracted = extracted
+        if not self._preview_redraw_timer.isActive():
+            self._preview_redraw_timer.start()
+
+    def _flush_preview_redraw(self):
+        dirty = sorted(self._dirty_preview_canvases)
+        self._dirty_preview_canvases.clear()
+        for index in dirty:
+            self._redraw_preview_canvas(index)
+        if self._pending_preview_extracted is not None:
+            self._set_preview_text(self._pending_preview_extracted)
+            self._pending_preview_extracted = None
+
     def _simulate_preview(self, silent=False):
-        settings = self._collect_preview_settings()
-        self._preview_manager.update_settings(settings)
+        self._apply_preview_settings(self._collect_preview_settings())
         event = {
             "timestamp": datetime.now(),
             "msg_type": self.sample_type_combo.currentData() or "recebido",
@@ -674,20 +1626,57 @@ class DataLoggerConfigDialog(QDialog):
 
     def _clear_preview(self):
         self._preview_manager = DataLoggerManager(self._collect_preview_settings())
+        self._preview_settings_applied = self._preview_settings_version
         self._refresh_preview_rule_combo()
         self._refresh_preview_views([])
 
+    def _refresh_runtime_stats(self):
+        if not callable(self._runtime_stats_provider):
+            return
+        try:
+            stats = self._runtime_stats_provider() or {}
+        except Exception:
+            return
+        values = {
+            "running": "Gravando" if stats.get("running") else "Parado",
+            "queue_depth": f"{stats.get('queue_depth', 0)}/{stats.get('queue_capacity', 0)} (max {stats.get('max_queue_depth', 0)})",
+            "processed_events": str(stats.get("processed_events", 0)),
+            "dropped_events": str(stats.get("dropped_events", 0)),
+            "pending_rows": str(stats.get("pending_rows", 0)),
+            "flush": f"{stats.get('last_flush_ms', 0.0):.1f} ms (max {stats.get('max_flush_ms', 0.0):.1f} ms, {stats.get('flush_count', 0)}x)",
+        }
+        for key, text in values.items():
+            self.runtime_stat_labels[key].setText(text)
+        self.runtime_stat_labels["dropped_events"].setStyleSheet("color: #FF6B6B;" if stats.get("dropped_events") else "")
+        last_error = str(stats.get("last_error", "") or "")
+        self.runtime_error_label.setText(f"Ultimo erro: {last_error}" if last_error else "")
+        self._refresh_rule_stats_table(stats.get("rule_stats") or {})
+
+    def _refresh_rule_stats_table(self, rule_stats):
+        if self.rule_stats_table.rowCount() != len(rule_stats):
+            self.rule_stats_table.setRowCount(len(rule_stats))
+        for row, (header, values) in enumerate(rule_stats.items()):
+            texts = [header, str(values.get("count", 0))]
+            for key in DATALOGGER_SUMMARY_KEYS[1:]:
+                value = values.get(key)
+                texts.append("-" if value is None else f"{value:.4g}")
+            for column, text in enumerate(texts):
+                item = self.rule_stats_table.item(row, column)
+                if item is None:
+                    self.rule_stats_table.setItem(row, column, QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+
     def consume_live_event(self, event):
         if not isinstance(event, dict):
             return []
         try:
-            settings = self._collect_preview_settings()
-            self._preview_manager.update_settings(settings)
+            self._sync_preview_settings()
             extracted = self._preview_manager.extract_values(event)
             self._preview_manager._append_preview(event.get("timestamp", datetime.now()), extracted)
             if self.preview_rule_combo.count() == 0:
                 self._refresh_preview_rule_combo()
-            self._refresh_preview_views(extracted)
+            self._schedule_preview_redraw(extracted)
             return extracted
         except Exception:
             return []
@@ -697,12 +1686,15 @@ class DataLoggerConfigDialog(QDialog):
         if not file_path:
             raise ValueError("Escolha um arquivo para o DataLogger.")
         settings = build_default_datalogger_settings()
-        settings["file_path"] = file_path if file_path.lower().endswith(".xlsx") else file_path + ".xlsx"
+        settings["file_path"] = _with_datalogger_extension(file_path)
         settings["sheet_name"] = self.sheet_name_input.text().strip() or "DataLogger"
         settings["header_row"] = self.header_row_spin.value()
         settings["enabled_types"] = [key for key, cb in self.type_checkboxes.items() if cb.isChecked()]
         settings["capture_mode"] = self.capture_mode_combo.currentData() or "event"
         settings["snapshot_window_ms"] = self.snapshot_window_spin.value()
+        settings["snapshot_start_marker"] = self.snapshot_start_input.text().strip()
+        settings["snapshot_end_marker"] = self.snapshot_end_input.text().strip()
+        settings["write_summary_on_stop"] = self.write_summary_checkbox.isChecked()
         settings["preset_name"] = self.preset_combo.currentText().strip() or "Personalizado"
         settings["rules"] = self._collect_rules()
         for key, edit in self.base_column_inputs.items():
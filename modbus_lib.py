@@ -12,6 +12,10 @@ def calculate_crc16(data: bytes) -> bytes:
     crc = _crc16(data)
     return crc.to_bytes(2, 'little') # 'little' para low byte primeiro
 
+def has_valid_crc(frame: bytes) -> bool:
+    """Verifica se o quadro RTU (endereço, função, dados, CRC) termina com o CRC16 correto."""
+    return len(frame) >= 4 and calculate_crc16(frame[:-2]) == bytes(frame[-2:])
+
 def hex_string_to_int(hex_str: str) -> int:
     """Converte uma string hexadecimal para um inteiro."""
     return int(hex_str, 16)
@@ -317,3 +321,64 @@ def parse_modbus_rtu_response(response_bytes: bytes, function_code_hex: str,
     else:
         return False, f"Código de função Modbus {fc:02X} não suportado para análise de resposta.", None
 
+
+# Estados de uma resposta RTU em montagem (ver extract_modbus_response)
+MODBUS_RESPONSE_INCOMPLETE = "incompleta"
+MODBUS_RESPONSE_COMPLETE = "completa"
+MODBUS_RESPONSE_EXCEPTION = "excecao"
+MODBUS_RESPONSE_INVALID = "invalida"
+MODBUS_EXCEPTION_RESPONSE_LENGTH = 5 # Slave ID, FC | 0x80, Código de exceção, CRC (2 bytes)
+
+
+def expected_response_length(request_bytes: bytes):
+    """
+    Tamanho exato da resposta normal para uma requisição RTU já montada.
+    Leituras: 5 + byte_count; escritas simples (0x05/0x06) e múltiplas (0x0F/0x10): 8.
+    Retorna None para códigos de função desconhecidos.
+    """
+    if not request_bytes or len(request_bytes) < 6:
+        return None
+    fc = request_bytes[1]
+    if fc in (0x01, 0x02): # Coils/entradas discretas: 1 bit por item
+        quantity = int.from_bytes(request_bytes[4:6], 'big')
+        return 5 + (quantity + 7) // 8
+    if fc in (0x03, 0x04): # Registradores: 2 bytes por item
+        quantity = int.from_bytes(request_bytes[4:6], 'big')
+        return 5 + 2 * quantity
+    if fc in (0x05, 0x06, 0x0F, 0x10):
+        return 8
+    return None
+
+
+def extract_modbus_response(buffer: bytes, request_bytes: bytes) -> tuple[str, bytes]:
+    """
+    Verifica se o buffer recebido já contém a resposta completa da requisição.
+    Retorna (estado, quadro): quadro é a resposta recortada no tamanho esperado quando o
+    estado é "completa" ou "excecao"; nos demais casos é o próprio buffer.
+    Permite concluir a transação assim que o último byte chega, sem esperar um atraso fixo.
+    """
+    data = bytes(buffer or b"")
+    if len(data) < 2:
+        return MODBUS_RESPONSE_INCOMPLETE, data
+
+    fc = request_bytes[1]
+    if data[0] != request_bytes[0] or data[1] not in (fc, fc | 0x80):
+        return MODBUS_RESPONSE_INVALID, data
+
+    if data[1] == (fc | 0x80):
+        length = MODBUS_EXCEPTION_RESPONSE_LENGTH
+        status = MODBUS_RESPONSE_EXCEPTION
+    else:
+        length = expected_response_length(request_bytes)
+        status = MODBUS_RESPONSE_COMPLETE
+        if length is None:
+            return MODBUS_RESPONSE_INVALID, data
+        if fc in (0x01, 0x02, 0x03, 0x04) and len(data) >= 3 and data[2] != length - 5:
+            return MODBUS_RESPONSE_INVALID, data
+
+    if len(data) < length:
+        return MODBUS_RESPONSE_INCOMPLETE, data
+    frame = data[:length]
+    if calculate_crc16(frame[:-2]) != frame[-2:]:
+        return MODBUS_RESPONSE_INVALID, data
+    return status, frame
@@ -0,0 +1,41 @@
+from EmbTech_Serial import ReceiveRingBuffer
+
+
+def test_overflow_counted_once_across_repeated_peeks():
+    ring = ReceiveRingBuffer(capacity=16)
+    ring.append(b"0123456789")
+    ring.append(b"abcdefghijklmnopqrstuvwx") # 34 bytes escritos: os 18 mais antigos saíram do anel
+
+    for _ in range(5):
+        assert ring.read(0) == b"ijklmnopqrstuvwx"
+    assert ring.overflow_bytes == 18
+
+
+def test_overflow_counts_only_new_losses():
+    ring = ReceiveRingBuffer(capacity=8)
+    ring.append(b"ABCDEFGHIJ") # 2 bytes perdidos
+    assert ring.read(0) == b"CDEFGHIJ"
+    ring.append(b"KLMN") # Mais 4 bytes perdidos para o mesmo cursor
+    assert ring.read(0) == b"GHIJKLMN"
+    assert ring.read(0) == b"GHIJKLMN"
+    assert ring.overflow_bytes == 6
+
+
+def test_position_since_finds_first_chunk_after_instant():
+    ring = ReceiveRingBuffer(capacity=64)
+    ring.append(b"old", rx_time=1.0)
+    ring.append(b"new", rx_time=2.0)
+    ring.append(b"more", rx_time=3.0)
+    assert ring.position_since(1.5) == 3
+    assert ring.read(ring.position_since(1.5)) == b"newmore"
+
+
+def test_position_since_detects_evicted_step_start():
+    ring = ReceiveRingBuffer(capacity=1 << 16)
+    ring.append(b"antes", rx_time=0.5)
+    for i in range(ReceiveRingBuffer.MAX_CHUNK_MARKS + 1):
+        ring.append(b"x", rx_time=1.0 + i)
+    # A marca do primeiro bloco depois de 1.0 foi descartada: o início não é mais conhecido
+    assert ring.position_since(1.0) is None
+    # Instantes ainda cobertos pelas marcas continuam exatos
+    assert ring.position_since(1.0 + ReceiveRingBuffer.MAX_CHUNK_MARKS) == ring.total_written - 1